@@ -0,0 +1,250 @@
+# Batched simulation of many bulldozers on the same site map
+# The bulldozers, called agents here, are held as arrays of locations, directions and cost
+# quantities. Every agent has a cleared bitmap over the shared square block codes of the site
+# map, packed eight square blocks per byte. Each tick applies one command to every agent
+# with vectorized operations, following the same rules as Bulldozer.applyCommand.
+
+import numpy as np
+
+from core.site_map import SquareType, squareTypesByCode
+from core.bulldozer import CommandType, Direction, Location
+from core.expense import CostItem, fuelConsumption, costPerQuantity
+from core.simulator_exceptions import QUITSIMULATION, OUTOFSITEMOVE, MOVEONPROTECTEDTREE
+
+
+# termination codes of the agents, 0 meaning the agent still accepts commands
+RUNNING = 0
+terminationReasons = {
+    1: QUITSIMULATION,
+    2: OUTOFSITEMOVE,
+    3: MOVEONPROTECTEDTREE
+}
+QUIT, OUTOFSITE, PROTECTEDTREE = 1, 2, 3
+
+# command value of an agent that has no command in a tick, used to pad shorter scripts
+IDLE = -1
+
+# row and column steps of one square block, indexed by Direction value
+rowSteps = np.array([0, 1, 0, -1], dtype=np.int64)
+columnSteps = np.array([1, 0, -1, 0], dtype=np.int64)
+
+# fuel consumed by each square block code, indexed by SquareType value
+fuelByCode = np.array([fuelConsumption[sqType] for sqType in squareTypesByCode], dtype=np.int64)
+
+# cost per unit of each cost item, indexed by CostItem value
+costVector = np.array([costPerQuantity[item] for item in sorted(CostItem, key=lambda item: item.value)],
+                      dtype=np.int64)
+
+
+class BatchEngine(object):
+    """
+    This class simulates K bulldozers on the same site map at once
+    """
+
+    def __init__(self, siteMap, agents):
+        """
+        Places all agents at the starting point of the bulldozer, facing east
+        :param siteMap(SiteMap): the site map shared by the agents, it is not modified
+        :param agents(int): number of agents
+        """
+        self.rows = siteMap.rows
+        self.columns = siteMap.columns
+        self.agents = agents
+        self.codes = np.frombuffer(bytes(siteMap.toCodes()), dtype=np.uint8)
+        self.cleared = np.zeros((agents, (self.rows * self.columns + 7) // 8), dtype=np.uint8)
+
+        self.row = np.zeros(agents, dtype=np.int64)
+        self.column = np.full(agents, -1, dtype=np.int64)
+        self.direction = np.full(agents, Direction.EAST.value, dtype=np.int64)
+        self.commandCount = np.zeros(agents, dtype=np.int64)
+        self.termination = np.full(agents, RUNNING, dtype=np.int8)
+        self.costQuantity = np.zeros((agents, len(CostItem)), dtype=np.int64)
+        self.costQuantity[:, CostItem.UNCLEARD_SQUARE.value] = siteMap.getClearableSquares()
+
+    def step(self, commandTypes, squares):
+        """
+        Applies one command to every agent that has not terminated
+        :param commandTypes(numpy.ndarray): CommandType value of the command of each agent, or IDLE
+        :param squares(numpy.ndarray): number of square blocks to advance, used by advance commands
+        """
+        running = (self.termination == RUNNING) & (commandTypes != IDLE)
+        self.commandCount[running] += 1
+
+        # The quit command has no communication overhead
+        quitting = running & (commandTypes == CommandType.QUIT.value)
+        self.termination[quitting] = QUIT
+        running &= ~quitting
+        self.costQuantity[running, CostItem.COMMUNICATION.value] += 1
+
+        turningRight = running & (commandTypes == CommandType.TURN_RIGHT.value)
+        self.direction[turningRight] = (self.direction[turningRight] + 1) % 4
+        turningLeft = running & (commandTypes == CommandType.TURN_LEFT.value)
+        self.direction[turningLeft] = (self.direction[turningLeft] - 1) % 4
+
+        advancing = running & (commandTypes == CommandType.ADVANCE.value)
+        if advancing.any():
+            self.advance(np.flatnonzero(advancing), squares[advancing])
+
+    def advance(self, agents, squares):
+        """
+        Moves the given agents forward, one square block per iteration for all of them
+        :param agents(numpy.ndarray): indices of the advancing agents
+        :param squares(numpy.ndarray): number of square blocks each of them advances
+        """
+        for i in range(1, int(squares.max()) + 1):
+            moving = squares >= i
+            agents = agents[moving]
+            squares = squares[moving]
+            if len(agents) == 0:
+                break
+
+            nextRow = self.row[agents] + rowSteps[self.direction[agents]]
+            nextColumn = self.column[agents] + columnSteps[self.direction[agents]]
+            inside = (nextRow >= 0) & (nextColumn >= 0) & (nextRow < self.rows) & (nextColumn < self.columns)
+            self.termination[agents[~inside]] = OUTOFSITE
+            agents = agents[inside]
+            squares = squares[inside]
+            nextRow = nextRow[inside]
+            nextColumn = nextColumn[inside]
+            self.row[agents] = nextRow
+            self.column[agents] = nextColumn
+
+            index = nextRow * self.columns + nextColumn
+            byte = index >> 3
+            bit = (1 << (index & 7)).astype(np.uint8)
+            isCleared = (self.cleared[agents, byte] & bit) != 0
+            codes = np.where(isCleared, SquareType.CLEAR.value, self.codes[index])
+
+            # Passing through a removable tree without stopping on it causes paint damage
+            paintDamage = (i < squares) & (codes == SquareType.REMOVABLE_TREE.value)
+            self.costQuantity[agents[paintDamage], CostItem.PAINT_DAMAGE.value] += 1
+
+            protectedTree = codes == SquareType.NONREMOVABLE_TREE.value
+            self.costQuantity[agents[protectedTree], CostItem.PROTECTED_TREE_DESTRUCTION.value] += 1
+            self.termination[agents[protectedTree]] = PROTECTEDTREE
+
+            visiting = ~protectedTree
+            agents = agents[visiting]
+            squares = squares[visiting]
+            codes = codes[visiting]
+            self.costQuantity[agents, CostItem.UNCLEARD_SQUARE.value] -= codes != SquareType.CLEAR.value
+            self.costQuantity[agents, CostItem.FUEL.value] += fuelByCode[codes]
+            # Every agent appears at most once, so the bits can be set without a race
+            self.cleared[agents, byte[visiting]] |= bit[visiting]
+
+    def run(self, commandTypes, squares):
+        """
+        Applies a sequence of ticks, one command per agent and tick
+        :param commandTypes(numpy.ndarray): CommandType values, of shape (ticks, agents)
+        :param squares(numpy.ndarray): advance lengths, of shape (ticks, agents)
+        """
+        for tick in range(len(commandTypes)):
+            if not (self.termination == RUNNING).any():
+                break
+            self.step(commandTypes[tick], squares[tick])
+
+    def getTotalCosts(self):
+        """
+        Returns the total cost of each agent
+        :rtype: numpy.ndarray
+        """
+        return self.costQuantity @ costVector
+
+    def getCostQuantity(self, agent):
+        """
+        Returns the cost quantities of an agent in the form of Expense.costQuantity
+        :param agent(int): index of the agent
+        :rtype: dict
+        """
+        return {item: int(self.costQuantity[agent, item.value]) for item in CostItem}
+
+    def getLocation(self, agent):
+        """
+        Returns the location of an agent
+        :param agent(int): index of the agent
+        :rtype: Location
+        """
+        return Location(int(self.row[agent]), int(self.column[agent]))
+
+    def getTerminationReason(self, agent):
+        """
+        Returns the termination message of an agent, None if it has not terminated
+        :param agent(int): index of the agent
+        :rtype: str
+        """
+        return terminationReasons.get(int(self.termination[agent]))
+
+    def getCodes(self, agent):
+        """
+        Returns the square block codes of the site map as cleared by an agent
+        :param agent(int): index of the agent
+        :rtype: bytearray
+        """
+        area = self.rows * self.columns
+        cleared = np.unpackbits(self.cleared[agent], bitorder="little")[:area].astype(bool)
+        return bytearray(np.where(cleared, SquareType.CLEAR.value, self.codes).astype(np.uint8).tobytes())
+
+
+def encodeScripts(scripts):
+    """
+    Converts the command scripts of the agents to the arrays used by BatchEngine.run
+    Shorter scripts are padded with IDLE ticks
+    Returns the CommandType values and advance lengths, both of shape (ticks, agents)
+    :param scripts(list): one list of valid simulator commands per agent
+    :rtype: tuple
+    """
+    ticks = max([len(commands) for commands in scripts] + [0])
+    commandTypes = np.full((ticks, len(scripts)), IDLE, dtype=np.int64)
+    squares = np.zeros((ticks, len(scripts)), dtype=np.int64)
+    for agent, commands in enumerate(scripts):
+        for tick, commandStr in enumerate(commands):
+            if commandStr[0] == 'a':
+                commandTypes[tick, agent] = CommandType.ADVANCE.value
+                squares[tick, agent] = int(commandStr.split()[1])
+            elif commandStr == 'right' or commandStr == 'r':
+                commandTypes[tick, agent] = CommandType.TURN_RIGHT.value
+            elif commandStr == 'left' or commandStr == 'l':
+                commandTypes[tick, agent] = CommandType.TURN_LEFT.value
+            else:
+                commandTypes[tick, agent] = CommandType.QUIT.value
+    return commandTypes, squares
+
+
+def randomCommands(rng, ticks, agents, maxAdvance, quitProbability=0.0):
+    """
+    Draws random commands for every agent and tick
+    Advances are as likely as the two turns together, and advance lengths are uniform
+    Returns the CommandType values and advance lengths, both of shape (ticks, agents)
+    :param rng(numpy.random.Generator): the random number generator
+    :param ticks(int): number of commands per agent
+    :param agents(int): number of agents
+    :param maxAdvance(int): the longest advance
+    :param quitProbability(float): probability of each command being a quit command
+    :rtype: tuple
+    """
+    turnProbability = (1.0 - quitProbability) / 4
+    commandTypes = rng.choice(
+        [CommandType.ADVANCE.value, CommandType.TURN_RIGHT.value, CommandType.TURN_LEFT.value, CommandType.QUIT.value],
+        size=(ticks, agents),
+        p=[2 * turnProbability, turnProbability, turnProbability, quitProbability])
+    squares = rng.integers(1, maxAdvance + 1, size=(ticks, agents))
+    return commandTypes, squares
+
+
+def simulateRandomPolicies(siteMap, agents, ticks, maxAdvance, seed=None, quitProbability=0.0):
+    """
+    Simulates agents issuing random commands on a site map
+    Returns the BatchEngine after all ticks, holding the costs of every agent
+    :param siteMap(SiteMap): the site map
+    :param agents(int): number of agents
+    :param ticks(int): number of commands per agent
+    :param maxAdvance(int): the longest advance
+    :param seed(int): seed of the random number generator
+    :param quitProbability(float): probability of each command being a quit command
+    :rtype: BatchEngine
+    """
+    rng = np.random.default_rng(seed)
+    engine = BatchEngine(siteMap, agents)
+    commandTypes, squares = randomCommands(rng, ticks, agents, maxAdvance, quitProbability)
+    engine.run(commandTypes, squares)
+    return engine
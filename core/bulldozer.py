@@ -156,7 +156,7 @@ class Bulldozer(object):
         :param column(int): the column if the visiting square block
         """
         # Detect the type of the square block
-        squareType = self.siteMap.siteMap[row][column]
+        squareType = self.siteMap.getSquare(row, column)
 
         if squareType == SquareType.NONREMOVABLE_TREE:
             # If visiting a protected tree, add the relevant cost and terminate the simulation
@@ -165,10 +165,10 @@ class Bulldozer(object):
         else:
             # If not a protected tree, add relevant cost, update the square block type to CLEAR, and
             # reduce the number of uncleared square block in the expenses
-            if self.siteMap.siteMap[row][column] != SquareType.CLEAR:
+            if squareType != SquareType.CLEAR:
                 self.expense.removeUnclearedSquare()
             self.expense.updateFuelConsumption(squareType)
-            self.siteMap.siteMap[row][column] = SquareType.CLEAR
+            self.siteMap.clearSquare(row, column)
 
     def terminate(self, quit=False, outOfSite=False):
         """
@@ -212,17 +212,30 @@ class Bulldozer(object):
         """
         # If advancedSquare == maxAdvance, it's not passing through. It's stopping there
         if advancedSquare < maxAdvance:
-            squareType = self.siteMap.siteMap[self.location.row][self.location.column]
+            squareType = self.siteMap.getSquare(self.location.row, self.location.column)
             if squareType == SquareType.REMOVABLE_TREE:
                 # a removable tree in such cases incurs paint damage cost
                 self.expense.addPaintDamage()
 
-    def generateReport(self):
+    def generateReport(self, zones=None):
         """
         Generates a report including the command history and costs
+        If zones are given, the uncleared squares are also broken down by zone
+        :param zones(list): the Zones of the site map, read by readZoneFile
         """
         print("\nThese are the commands you issued:\n")
         print(", ".join(self.history))
 
         print("\nThe costs for this land clearing operation were:\n")
         self.expense.generateCostReport()
+
+        if zones:
+            # The zone report needs NumPy, which is only imported when zones are given
+            from core.region_stats import RegionStats, generateZoneReport
+
+            # The counts are kept up to date by the site map if they were attached to it
+            regionStats = self.siteMap.regionStats
+            if regionStats is None:
+                regionStats = RegionStats(self.siteMap)
+            print("\nThe uncleared squares of each zone were:\n")
+            generateZoneReport(regionStats, zones)
@@ -0,0 +1,153 @@
+# Lower bounds on the cost of clearing a site
+# Used to grade the Expense total of a trainee against the best cost achievable on the site.
+#
+# The bound is built from three parts:
+#   1- Squares that cannot be reached from the entry point always stay uncleared
+#   2- Every reachable square is either cleared, using at least its own fuel,
+#      or left uncleared
+#   3- An advance clears squares of a single row or column, so clearing all reachable squares
+#      needs at least as many advances as the size of a matching between their rows and columns,
+#      and a turn between any two of the matched squares
+# Bounds are cached on disk, keyed by the content of the site map file and the cost tables.
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from core.site_map import SiteMap, SquareType, squareTypesByCode
+from core.expense import CostItem, fuelConsumption, costPerQuantity
+from core.disk_cache import getCacheDirectory, fileContentHash, writeAtomically
+from core.reachability import RegionAnalysis
+
+
+# fingerprint of the cost tables, cached bounds are recomputed when the costs change
+costTablesFingerprint = hashlib.sha256(json.dumps([
+    sorted((sqType.name, fuel) for sqType, fuel in fuelConsumption.items()),
+    sorted((item.name, cost) for item, cost in costPerQuantity.items())
+]).encode("utf-8")).hexdigest()[:16]
+
+
+class CostLowerBound(object):
+    """
+    This class holds a lower bound on the cost of clearing a site and its components
+    """
+
+    def __init__(self, reachableSquares, unreachableSquares, minFuel, minCommands, totalCost):
+        """
+        :param reachableSquares(int): number of clearable squares reachable from the entry point
+        :param unreachableSquares(int): number of clearable squares that can never be cleared
+        :param minFuel(int): fuel needed to clear every reachable square
+        :param minCommands(int): commands needed to clear every reachable square
+        :param totalCost(int): lower bound on the total cost of any sequence of commands
+        """
+        self.reachableSquares = reachableSquares
+        self.unreachableSquares = unreachableSquares
+        self.minFuel = minFuel
+        self.minCommands = minCommands
+        self.totalCost = totalCost
+
+    def getUnavoidableUnclearedCost(self):
+        """
+        Returns the cost of the squares that can never be cleared
+        :rtype: int
+        """
+        return self.unreachableSquares * costPerQuantity[CostItem.UNCLEARD_SQUARE]
+
+    def toDict(self):
+        """
+        Returns the bound as a dictionary that can be stored as JSON
+        :rtype: dict
+        """
+        return {
+            "reachableSquares": self.reachableSquares,
+            "unreachableSquares": self.unreachableSquares,
+            "minFuel": self.minFuel,
+            "minCommands": self.minCommands,
+            "totalCost": self.totalCost
+        }
+
+    @classmethod
+    def fromDict(cls, values):
+        """
+        Creates a bound from a dictionary created by toDict
+        :param values(dict): the stored bound
+        :rtype: CostLowerBound
+        """
+        return cls(values["reachableSquares"], values["unreachableSquares"],
+                   values["minFuel"], values["minCommands"], values["totalCost"])
+
+
+def estimateLowerBound(siteMap):
+    """
+    Calculates a lower bound on the cost of clearing the given site map
+    :param siteMap(SiteMap): the site map, before any command is applied
+    :rtype: CostLowerBound
+    """
+    siteCodes = siteMap.toCodes()
+    codes = np.frombuffer(siteCodes, dtype=np.uint8).reshape(siteMap.rows, siteMap.columns)
+    analysis = RegionAnalysis.fromCodes(siteCodes, siteMap.rows, siteMap.columns)
+    reachable = analysis.reachable & ((codes == SquareType.PLAIN.value) |
+                                      (codes == SquareType.ROCK.value) |
+                                      (codes == SquareType.REMOVABLE_TREE.value))
+
+    fuelCost = costPerQuantity[CostItem.FUEL]
+    unclearedCost = costPerQuantity[CostItem.UNCLEARD_SQUARE]
+    communicationCost = costPerQuantity[CostItem.COMMUNICATION]
+    fuelByCode = np.array([fuelConsumption[sqType] for sqType in squareTypesByCode], dtype=np.int64)
+
+    reachableCodes = codes[reachable]
+    minFuel = int(fuelByCode[reachableCodes].sum())
+    # cheapest of clearing each reachable square and leaving it uncleared
+    squaresCost = int(np.minimum(fuelByCode * fuelCost, unclearedCost - communicationCost)[reachableCodes].sum())
+
+    # A greedy maximal matching between the rows and the columns of the reachable squares,
+    # each row is matched to its first reachable square in a column that is not matched yet.
+    # Its size is at most the minimum number of lines covering them
+    matchedColumns = np.zeros(siteMap.columns, dtype=bool)
+    matching = 0
+    for row in np.flatnonzero(reachable.any(axis=1)):
+        columns = np.flatnonzero(reachable[row] & ~matchedColumns)
+        if len(columns):
+            matchedColumns[columns[0]] = True
+            matching += 1
+
+    # Each matched square needs its own advance, with a turn between two of them
+    minCommands = 2 * matching - 1 if matching > 0 else 0
+    # Leaving a square uncleared saves at most one of the matched advances
+    unreachableSquares = analysis.getUnreachableSquares()
+    totalCost = unreachableSquares * unclearedCost + squaresCost + matching * communicationCost
+    return CostLowerBound(len(reachableCodes), unreachableSquares, minFuel, minCommands, totalCost)
+
+
+def getLowerBound(siteMapFile, cacheDirectory=None, siteMap=None):
+    """
+    Returns the lower bound of a site map file, computing it only if it is not cached
+    The bound is computed every time if the cache cannot be used
+    :param siteMapFile(str): the path to the site map file
+    :param cacheDirectory(str): directory of the cached bounds, defaults to the "bounds" cache
+    :param siteMap(SiteMap): the site map of the file if it is already loaded, it is read from the file otherwise
+    :rtype: CostLowerBound
+    """
+    cachePath = None
+    try:
+        if cacheDirectory is None:
+            cacheDirectory = getCacheDirectory("bounds")
+        key = "{}-{}".format(fileContentHash(siteMapFile), costTablesFingerprint)
+        cachePath = os.path.join(cacheDirectory, key + ".json")
+        with open(cachePath, "r") as f:
+            return CostLowerBound.fromDict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        # Not cached yet, or the cache cannot be used
+        pass
+
+    if siteMap is None:
+        siteMap = SiteMap(siteMapFile)
+    bound = estimateLowerBound(siteMap)
+    if cachePath is not None:
+        try:
+            writeAtomically(cachePath, json.dumps(bound.toDict()).encode("utf-8"))
+        except OSError:
+            pass
+    return bound
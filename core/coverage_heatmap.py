@@ -0,0 +1,180 @@
+# Cross-session coverage analytics for a single site
+# Replays archived sessions of one site map and counts, for every square block,
+# how often the bulldozer visited it, stopped on it, passed through a removable tree on it,
+# and how often a session was terminated on it by leaving the site or hitting a protected tree.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.site_map import SiteMap
+from core.session import readSessionFile, replaySession, countUnclearedSquares
+from core.raster import writeImage, heatColours, upscale
+from core.simulator_exceptions import OUTOFSITEMOVE, MOVEONPROTECTEDTREE
+
+
+# names of the count layers, in the order they are stored
+layerNames = ["visits", "stops", "tree_hits", "terminations"]
+
+# terminations that are counted, quitting the simulation is not counted
+countedTerminations = [OUTOFSITEMOVE, MOVEONPROTECTEDTREE]
+
+# archives smaller than this number of sessions are replayed in the calling process
+parallelThreshold = 512
+
+
+class CoverageHeatmap(object):
+    """
+    This class accumulates per-square counts of many sessions on the same site map
+    Sessions are replayed in batches, and the square block indices of each batch are
+    added at once with numpy.add.at, so the work grows with the visits and not with the area
+    """
+
+    def __init__(self, siteMap):
+        """
+        Initializes all counts to zero
+        :param siteMap(SiteMap): the site map of the sessions
+        """
+        self.rows = siteMap.rows
+        self.columns = siteMap.columns
+        self.codes = bytes(siteMap.toCodes())
+        self.totalUncleared = countUnclearedSquares(self.codes)
+        self.sessions = 0
+        self.counts = np.zeros((len(layerNames), self.rows, self.columns), dtype=np.int64)
+
+    def addSessions(self, sessions):
+        """
+        Replays a batch of sessions and adds their counts
+        :param sessions(list): list of sessions, each a list of commands
+        """
+        indices = [[] for _ in layerNames]
+        for commands in sessions:
+            result = replaySession(self.codes, self.rows, self.columns, commands, self.totalUncleared)
+            indices[0].extend(result.visits)
+            indices[1].extend(result.stops)
+            indices[2].extend(result.treeHits)
+            if result.terminationReason in countedTerminations and result.terminationCell is not None:
+                indices[3].append(result.terminationCell)
+        for layer in range(len(layerNames)):
+            np.add.at(self.counts[layer].reshape(-1), np.asarray(indices[layer], dtype=np.intp), 1)
+        self.sessions += len(sessions)
+
+    def addSessionFiles(self, sessionFiles, batchSize=256):
+        """
+        Reads and replays the given session files in the calling process
+        :param sessionFiles(list): paths to the session files
+        :param batchSize(int): number of sessions counted at once
+        """
+        for start in range(0, len(sessionFiles), batchSize):
+            batch = [readSessionFile(filePath) for filePath in sessionFiles[start:start + batchSize]]
+            self.addSessions(batch)
+
+    def getNonzeroCounts(self):
+        """
+        Returns, for every layer, the row-major indices of the square blocks with a count and their counts
+        :rtype: list
+        """
+        nonzeroCounts = []
+        for layer in range(len(layerNames)):
+            counts = self.counts[layer].reshape(-1)
+            indices = np.flatnonzero(counts)
+            nonzeroCounts.append((indices, counts[indices]))
+        return nonzeroCounts
+
+    def addNonzeroCounts(self, nonzeroCounts, sessions):
+        """
+        Adds counts returned by getNonzeroCounts
+        :param nonzeroCounts(list): for every layer, the indices of the square blocks and their counts
+        :param sessions(int): the number of sessions of the counts
+        """
+        for layer, (indices, counts) in enumerate(nonzeroCounts):
+            self.counts[layer].reshape(-1)[indices] += counts
+        self.sessions += sessions
+
+    def merge(self, other):
+        """
+        Adds the counts of another heat map of the same site map
+        :param other(CoverageHeatmap): the heat map to add
+        """
+        self.counts += other.counts
+        self.sessions += other.sessions
+
+    def getLayer(self, name):
+        """
+        Returns the 2-D count array of the given layer
+        :param name(str): one of layerNames
+        :rtype: numpy.ndarray
+        """
+        return self.counts[layerNames.index(name)]
+
+    def saveCsv(self, directory):
+        """
+        Writes each layer to <directory>/<layer>.csv, one row of the site map per line
+        :param directory(str): the output directory
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for layer, name in enumerate(layerNames):
+            np.savetxt(os.path.join(directory, name + ".csv"), self.counts[layer], fmt="%d", delimiter=",")
+
+    def saveNumpy(self, filePath):
+        """
+        Writes all layers to a compressed NumPy .npz file, one array per layer
+        :param filePath(str): the path to the output file
+        """
+        layers = {name: self.counts[layer] for layer, name in enumerate(layerNames)}
+        np.savez_compressed(filePath, sessions=np.array(self.sessions), **layers)
+
+    def render(self, filePath, name="visits", scale=1):
+        """
+        Renders a layer as a heat map image, PNG or PPM depending on the file extension
+        :param filePath(str): the path to the output image
+        :param name(str): one of layerNames
+        :param scale(int): the number of pixels per square block
+        """
+        writeImage(filePath, upscale(heatColours(self.getLayer(name)), scale))
+
+
+# The site map of the sessions replayed by a worker process, set once per process
+_workerHeatmap = None
+
+
+def _initWorker(siteMapFile):
+    global _workerHeatmap
+    _workerHeatmap = CoverageHeatmap(SiteMap(siteMapFile))
+
+
+def _countShare(task):
+    # A worker replays its whole share of the archive, batch by batch, and returns only
+    # the square blocks with a count, once
+    sessionFiles, batchSize = task
+    _workerHeatmap.counts[:] = 0
+    _workerHeatmap.sessions = 0
+    _workerHeatmap.addSessionFiles(sessionFiles, batchSize)
+    return _workerHeatmap.getNonzeroCounts(), _workerHeatmap.sessions
+
+
+def buildHeatmap(siteMapFile, sessionFiles, workers=None, batchSize=256):
+    """
+    Replays all session files of a site map into a CoverageHeatmap
+    Large archives are split into one share per process and replayed by a pool of processes,
+    each of which reads the site map only once and returns its counts only once
+    :param siteMapFile(str): the path to the site map file
+    :param sessionFiles(list): paths to the session files
+    :param workers(int): number of processes, defaults to the number of CPUs
+    :param batchSize(int): number of sessions counted at once
+    :rtype: CoverageHeatmap
+    """
+    heatmap = CoverageHeatmap(SiteMap(siteMapFile))
+    if len(sessionFiles) < parallelThreshold or workers == 1:
+        heatmap.addSessionFiles(sessionFiles, batchSize)
+        return heatmap
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shares = [(sessionFiles[share::workers], batchSize) for share in range(workers) if share < len(sessionFiles)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(siteMapFile,)) as pool:
+        for nonzeroCounts, sessions in pool.map(_countShare, shares):
+            heatmap.addNonzeroCounts(nonzeroCounts, sessions)
+    return heatmap
@@ -0,0 +1,52 @@
+# Helpers for the on-disk caches of the simulator tools
+# Cached files are kept under ~/.cache/oracle_simulator, unless the
+# ORACLE_SIMULATOR_CACHE environment variable points to another directory
+
+import hashlib
+import os
+
+
+CACHEENVIRONMENTVARIABLE = "ORACLE_SIMULATOR_CACHE"
+
+
+def getCacheDirectory(name):
+    """
+    Returns the directory of the named cache, creating it if needed
+    :param name(str): the name of the cache
+    :rtype: str
+    """
+    root = os.environ.get(CACHEENVIRONMENTVARIABLE,
+                          os.path.join(os.path.expanduser("~"), ".cache", "oracle_simulator"))
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return directory
+
+
+def fileContentHash(filePath, blockSize=1 << 20):
+    """
+    Returns the SHA-256 hex digest of the content of a file
+    :param filePath(str): the path to the file
+    :param blockSize(int): number of bytes read at once
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(filePath, "rb") as f:
+        block = f.read(blockSize)
+        while block:
+            digest.update(block)
+            block = f.read(blockSize)
+    return digest.hexdigest()
+
+
+def writeAtomically(filePath, *chunks):
+    """
+    Writes data to a file through a temporary file, so readers never see a partial file
+    :param filePath(str): the path to the file
+    :param chunks(bytes): the content of the file, in one or more parts written one after the other
+    """
+    temporaryPath = "{}.{}.tmp".format(filePath, os.getpid())
+    with open(temporaryPath, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temporaryPath, filePath)
@@ -0,0 +1,330 @@
+# Differential fuzzing of the simulation engines
+# Random site maps and command scripts are executed by the reference engine, the Bulldozer
+# class, and by the alternative engines. The final site map, location, command history,
+# termination and every cost quantity must be the same. Failing cases are shrunk to a minimal
+# reproduction by removing commands, shortening advances and simplifying the site map.
+# An engine that raises an exception fails the case like an engine that disagrees.
+
+import random
+import time
+
+from core.site_map import SiteMap, SquareType, squareCharacterMap, squareTypesByCode
+from core.sparse_site_map import SparseSiteMap
+from core.bulldozer import Bulldozer
+from core.session import replaySession
+from core.batch_engine import BatchEngine, encodeScripts
+
+
+class FuzzCase(object):
+    """
+    This class represents a site map and a command script to execute on it
+    """
+
+    def __init__(self, codes, rows, columns, commands):
+        """
+        :param codes(bytes): row-major square block codes of the site map
+        :param rows(int): number of rows of the site map
+        :param columns(int): number of columns of the site map
+        :param commands(list): valid simulator commands
+        """
+        self.codes = bytes(codes)
+        self.rows = rows
+        self.columns = columns
+        self.commands = list(commands)
+
+    def describe(self):
+        """
+        Returns the site map file content and the commands of the case, to reproduce it
+        :rtype: str
+        """
+        lines = []
+        for i in range(self.rows):
+            row = self.codes[i * self.columns:(i + 1) * self.columns]
+            lines.append("".join(squareCharacterMap[squareTypesByCode[code]] for code in row))
+        return "\n".join(lines) + "\n\ncommands: " + ", ".join(self.commands)
+
+
+class EngineOutcome(object):
+    """
+    This class holds the final state of a case executed by an engine
+    An engine that does not keep a command history sets history to None
+    """
+
+    def __init__(self, codes, location, history, costQuantity, terminationReason):
+        self.codes = bytes(codes)
+        self.location = location
+        self.history = history
+        self.costQuantity = costQuantity
+        self.terminationReason = terminationReason
+
+
+def _runBulldozer(case, siteMapClass):
+    """
+    Executes a case on a Bulldozer over a site map of the given class
+    """
+    bulldozer = Bulldozer(siteMapClass.fromCodes(case.codes, case.rows, case.columns))
+    terminationReason = None
+    for commandStr in case.commands:
+        try:
+            bulldozer.applyCommand(commandStr)
+        except Exception as e:
+            terminationReason = str(e)
+            break
+    return EngineOutcome(bulldozer.siteMap.toCodes(), (bulldozer.location.row, bulldozer.location.column),
+                         list(bulldozer.history), dict(bulldozer.expense.costQuantity), terminationReason)
+
+
+def referenceEngine(case):
+    """
+    Executes a case on a Bulldozer, stopping at the first termination like the simulator
+    :param case(FuzzCase): the case to execute
+    :rtype: EngineOutcome
+    """
+    return _runBulldozer(case, SiteMap)
+
+
+def sparseEngine(case):
+    """
+    Executes a case on a Bulldozer over a sparse site map
+    :param case(FuzzCase): the case to execute
+    :rtype: EngineOutcome
+    """
+    return _runBulldozer(case, SparseSiteMap)
+
+
+def sessionEngine(case):
+    """
+    Executes a case with the lightweight session replay
+    :param case(FuzzCase): the case to execute
+    :rtype: EngineOutcome
+    """
+    result = replaySession(case.codes, case.rows, case.columns, case.commands)
+    codes = bytearray(case.codes)
+    for index in result.cleared:
+        codes[index] = SquareType.CLEAR.value
+    return EngineOutcome(codes, (result.location.row, result.location.column),
+                         result.history, result.costQuantity, result.terminationReason)
+
+
+def batchEngine(case):
+    """
+    Executes a case as the single agent of a BatchEngine
+    :param case(FuzzCase): the case to execute
+    :rtype: EngineOutcome
+    """
+    engine = BatchEngine(SiteMap.fromCodes(case.codes, case.rows, case.columns), 1)
+    engine.run(*encodeScripts([case.commands]))
+    location = engine.getLocation(0)
+    return EngineOutcome(engine.getCodes(0), (location.row, location.column), None,
+                         engine.getCostQuantity(0), engine.getTerminationReason(0))
+
+
+# the alternative engines compared with the reference engine by default
+alternativeEngines = {
+    "session": sessionEngine,
+    "batch": batchEngine,
+    "sparse": sparseEngine
+}
+
+
+def compareOutcomes(expected, actual):
+    """
+    Compares the outcome of an engine with the outcome of the reference engine
+    Returns the list of differences, empty if the outcomes are the same
+    :param expected(EngineOutcome): outcome of the reference engine
+    :param actual(EngineOutcome): outcome of the alternative engine
+    :rtype: list
+    """
+    differences = []
+    if actual.codes != expected.codes:
+        changed = [i for i in range(len(expected.codes)) if actual.codes[i] != expected.codes[i]]
+        differences.append("site map differs at squares {}".format(changed))
+    if actual.location != expected.location:
+        differences.append("location {} instead of {}".format(actual.location, expected.location))
+    if actual.history is not None and actual.history != expected.history:
+        differences.append("history {} instead of {}".format(actual.history, expected.history))
+    for item, quantity in expected.costQuantity.items():
+        if actual.costQuantity.get(item) != quantity:
+            differences.append("{} is {} instead of {}".format(item.name, actual.costQuantity.get(item), quantity))
+    if actual.terminationReason != expected.terminationReason:
+        differences.append("termination {!r} instead of {!r}".format(actual.terminationReason,
+                                                                     expected.terminationReason))
+    return differences
+
+
+def engineDifferences(expected, engine, case):
+    """
+    Executes a case on an alternative engine and compares its outcome with the outcome of the reference engine
+    An exception raised by the engine is reported as a difference
+    :param expected(EngineOutcome): outcome of the reference engine
+    :param engine(function): the alternative engine
+    :param case(FuzzCase): the case to execute
+    :rtype: list
+    """
+    try:
+        actual = engine(case)
+    except Exception as e:
+        return ["raised {}: {}".format(type(e).__name__, e)]
+    return compareOutcomes(expected, actual)
+
+
+def randomCase(rng, maxRows=8, maxColumns=8, maxCommands=20, maxAdvance=6):
+    """
+    Generates a random case
+    Site maps are mostly plain land with every other type of square block, including cleared ones,
+    and scripts mix all forms of the commands, with an occasional quit command
+    :param rng(random.Random): the random number generator
+    :param maxRows(int): the largest number of rows
+    :param maxColumns(int): the largest number of columns
+    :param maxCommands(int): the longest script
+    :param maxAdvance(int): the longest advance
+    :rtype: FuzzCase
+    """
+    rows = rng.randint(1, maxRows)
+    columns = rng.randint(1, maxColumns)
+    weights = [6, 2, 2, 1, 1]
+    codes = bytes(rng.choices([sqType.value for sqType in squareTypesByCode], weights, k=rows * columns))
+    commands = []
+    for _ in range(rng.randint(0, maxCommands)):
+        choice = rng.random()
+        if choice < 0.5:
+            commands.append("{} {}".format(rng.choice(["a", "advance"]), rng.randint(1, maxAdvance)))
+        elif choice < 0.72:
+            commands.append(rng.choice(["r", "right"]))
+        elif choice < 0.94:
+            commands.append(rng.choice(["l", "left"]))
+        else:
+            commands.append(rng.choice(["q", "quit"]))
+    return FuzzCase(codes, rows, columns, commands)
+
+
+def shrinkCase(case, engine):
+    """
+    Shrinks a failing case while the engine still disagrees with the reference engine
+    Removes chunks of commands, shortens advances, removes rows and columns at the edges,
+    and turns square blocks into plain land
+    :param case(FuzzCase): a case on which the engine fails
+    :param engine(function): the alternative engine
+    :rtype: FuzzCase
+    """
+    def fails(candidate):
+        return len(engineDifferences(referenceEngine(candidate), engine, candidate)) > 0
+
+    shrinking = True
+    while shrinking:
+        shrinking = False
+
+        # Remove chunks of commands, from halves of the script down to single commands
+        chunk = max(len(case.commands) // 2, 1)
+        while chunk >= 1 and case.commands:
+            start = 0
+            while start < len(case.commands):
+                candidate = FuzzCase(case.codes, case.rows, case.columns,
+                                     case.commands[:start] + case.commands[start + chunk:])
+                if fails(candidate):
+                    case = candidate
+                    shrinking = True
+                else:
+                    start += chunk
+            chunk //= 2
+
+        # Shorten advances
+        for i, commandStr in enumerate(case.commands):
+            if commandStr[0] == 'a' and int(commandStr.split()[1]) > 1:
+                commands = list(case.commands)
+                commands[i] = "a {}".format(int(commandStr.split()[1]) - 1)
+                candidate = FuzzCase(case.codes, case.rows, case.columns, commands)
+                if fails(candidate):
+                    case = candidate
+                    shrinking = True
+
+        # Remove the first or the last row or column of the site map
+        candidates = []
+        if case.rows > 1:
+            candidates.append(FuzzCase(case.codes[case.columns:], case.rows - 1, case.columns, case.commands))
+            candidates.append(FuzzCase(case.codes[:(case.rows - 1) * case.columns], case.rows - 1, case.columns,
+                                       case.commands))
+        if case.columns > 1:
+            rows = [case.codes[i * case.columns:(i + 1) * case.columns] for i in range(case.rows)]
+            candidates.append(FuzzCase(b"".join(row[1:] for row in rows), case.rows, case.columns - 1,
+                                       case.commands))
+            candidates.append(FuzzCase(b"".join(row[:-1] for row in rows), case.rows, case.columns - 1,
+                                       case.commands))
+        for candidate in candidates:
+            if fails(candidate):
+                case = candidate
+                shrinking = True
+                break
+
+        # Simplify square blocks to plain land
+        for index, code in enumerate(case.codes):
+            if code != SquareType.PLAIN.value:
+                codes = bytearray(case.codes)
+                codes[index] = SquareType.PLAIN.value
+                candidate = FuzzCase(codes, case.rows, case.columns, case.commands)
+                if fails(candidate):
+                    case = candidate
+                    shrinking = True
+    return case
+
+
+class FuzzReport(object):
+    """
+    This class holds the results of a fuzzing run
+    """
+
+    def __init__(self, engineNames):
+        """
+        :param engineNames(list): names of the alternative engines
+        """
+        self.cases = 0
+        # list of (engine name, shrunk case, differences)
+        self.failures = []
+        # total seconds spent in each engine, including the reference engine
+        self.seconds = dict((name, 0.0) for name in ["reference"] + list(engineNames))
+
+    def getExecutionsPerSecond(self):
+        """
+        Returns the number of cases executed per second by each engine
+        :rtype: dict
+        """
+        return dict((name, self.cases / seconds if seconds > 0 else float("inf"))
+                    for name, seconds in self.seconds.items())
+
+
+def runFuzz(iterations, seed=0, engines=None, shrink=True, maxFailures=10, **caseOptions):
+    """
+    Compares the alternative engines with the reference engine on random cases
+    :param iterations(int): number of random cases
+    :param seed(int): seed of the random number generator, the same seed generates the same cases
+    :param engines(dict): alternative engines by name, defaults to alternativeEngines
+    :param shrink(bool): if True, failing cases are shrunk
+    :param maxFailures(int): the run stops after this number of failures
+    :param caseOptions: options of randomCase
+    :rtype: FuzzReport
+    """
+    if engines is None:
+        engines = alternativeEngines
+    rng = random.Random(seed)
+    report = FuzzReport(engines.keys())
+    for _ in range(iterations):
+        case = randomCase(rng, **caseOptions)
+        report.cases += 1
+
+        start = time.perf_counter()
+        expected = referenceEngine(case)
+        report.seconds["reference"] += time.perf_counter() - start
+
+        for name, engine in engines.items():
+            start = time.perf_counter()
+            differences = engineDifferences(expected, engine, case)
+            report.seconds[name] += time.perf_counter() - start
+            if differences:
+                failingCase = case
+                if shrink:
+                    failingCase = shrinkCase(case, engine)
+                    differences = engineDifferences(referenceEngine(failingCase), engine, failingCase)
+                report.failures.append((name, failingCase, differences))
+        if len(report.failures) >= maxFailures:
+            break
+    return report
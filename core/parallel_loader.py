@@ -0,0 +1,280 @@
+# Parallel validation and decoding of very large site map files
+# The file is memory-mapped and split into byte ranges that start and end on line boundaries.
+# A pool of processes then works on the ranges in two passes:
+#   1. each range counts its lines, which gives the first row of every range
+#   2. each range checks the characters and the width of its lines, and writes the square
+#      block codes of its rows (see SiteMap.toCodes) into an output buffer shared by all processes
+# Ranges made only of complete rows of valid characters are checked and decoded with NumPy;
+# the others are gone through line by line to find the exact position of every error.
+# Every range counts all its errors but keeps only the first maxErrors of them. The errors of all
+# the ranges are merged, sorted by line and column, which are counted from 1.
+# decodedCodes gives the decoded codes while they are still in the shared output buffer, so they
+# can be written or converted without copying them first.
+
+import mmap
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.site_map import SiteMap, squareTypeMap, squareTypesByCode
+from core.simulator_exceptions import (
+    FILENOTEXIST,
+    READACCESSNOTPROVIDED,
+    EMPTYFILE,
+    UNACCEPTABLESQUAREAT,
+    NOTAGRIDAT,
+    SITEMAPERRORS
+)
+
+
+# code of the bytes that are not square blocks
+INVALIDCODE = 255
+
+# table mapping every byte of the file to its square block code
+decodingTable = bytearray([INVALIDCODE] * 256)
+for character, sqType in squareTypeMap.items():
+    decodingTable[ord(character)] = sqType.value
+decodingTable = bytes(decodingTable)
+decodingArray = np.frombuffer(decodingTable, dtype=np.uint8)
+invalidByte = bytes([INVALIDCODE])
+
+# default number of bytes of a range, files smaller than this are decoded in the calling process
+defaultChunkSize = 32 << 20
+
+# largest number of errors kept by a range, and shown in the message of the exception
+maxErrors = 100
+
+
+_workerMap = None
+_workerOutput = None
+
+
+def _initWorker(filePath, output):
+    """
+    Maps the site map file in a process, and sets its output buffer
+    :param filePath(str): the path to the site map file
+    :param output: the name of the shared output buffer, or a bytearray in the calling process
+    """
+    global _workerMap, _workerOutput
+    with open(filePath, "rb") as f:
+        _workerMap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if isinstance(output, str):
+        _workerOutput = shared_memory.SharedMemory(name=output)
+    else:
+        _workerOutput = output
+
+
+def _releaseWorker():
+    """
+    Releases the mapped file and the output buffer of the calling process
+    """
+    global _workerMap, _workerOutput
+    if _workerMap is not None:
+        _workerMap.close()
+    _workerMap = None
+    _workerOutput = None
+
+
+def _countLines(task):
+    """
+    Returns the number of lines of a range, the last line of the file may have no line break
+    """
+    start, end = task
+    count = _workerMap[start:end].count(b"\n")
+    if end == len(_workerMap) and _workerMap[end - 1] != ord("\n"):
+        count += 1
+    return count
+
+
+def _formatCharacter(data, position):
+    """
+    Returns a printable form of the byte of data at position
+    """
+    return data[position:position + 1].decode("ascii", "backslashreplace")
+
+
+def _decodeChunk(task):
+    """
+    Checks the lines of a range and writes their square block codes to the output buffer
+    Returns the number of errors of the range, and the list of (line, column, message)
+    of the first maxErrors of them
+    """
+    start, end, firstRow, rows, columns, lineBreak = task
+    data = _workerMap[start:end]
+    if isinstance(_workerOutput, shared_memory.SharedMemory):
+        output = _workerOutput.buf
+    else:
+        output = _workerOutput
+
+    # Fast path: every line has the width of the first line, the same line break, and valid characters
+    stride = columns + len(lineBreak)
+    if not data.endswith(b"\n"):
+        data += lineBreak
+    if len(data) == rows * stride:
+        lines = np.frombuffer(data, dtype=np.uint8).reshape(rows, stride)
+        if (lines[:, columns:] == np.frombuffer(lineBreak, dtype=np.uint8)).all():
+            codes = np.take(decodingArray, lines[:, :columns])
+            if codes.size == 0 or codes.max() < len(squareTypesByCode):
+                output[firstRow * columns:(firstRow + rows) * columns] = codes.tobytes()
+                return 0, []
+
+    errorCount = 0
+    errors = []
+    for i, line in enumerate(data.split(b"\n")[:rows]):
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        lineNumber = firstRow + i + 1
+        codes = line.translate(decodingTable)
+        lineErrors = codes.count(invalidByte)
+        if len(line) != columns:
+            lineErrors += 1
+            if len(errors) < maxErrors:
+                errors.append((lineNumber, 0, NOTAGRIDAT.format(lineNumber, len(line), columns)))
+        if not lineErrors:
+            output[(lineNumber - 1) * columns:lineNumber * columns] = codes
+            continue
+        errorCount += lineErrors
+        position = codes.find(invalidByte)
+        while position >= 0 and len(errors) < maxErrors:
+            errors.append((lineNumber, position + 1,
+                           UNACCEPTABLESQUAREAT.format(lineNumber, position + 1, _formatCharacter(line, position))))
+            position = codes.find(invalidByte, position + 1)
+    return errorCount, errors
+
+
+def splitLines(fileMap, chunkSize):
+    """
+    Splits a mapped file into ranges of about chunkSize bytes that end right after a line break
+    Returns the list of (start, end) of the ranges
+    :param fileMap(mmap.mmap): the mapped file
+    :param chunkSize(int): number of bytes of a range
+    :rtype: list
+    """
+    ranges = []
+    start = 0
+    while start < len(fileMap):
+        end = fileMap.find(b"\n", min(start + chunkSize, len(fileMap)) - 1)
+        end = len(fileMap) if end < 0 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+@contextmanager
+def decodedCodes(filePath, workers=None, chunkSize=defaultChunkSize):
+    """
+    Reads, checks and decodes a site map file with a pool of processes
+    The width of every line is checked against the first line. All the errors are counted and reported
+    at once, the first maxErrors of them with their line and column, in the message of the exception
+    Gives the square block codes, as returned by SiteMap.toCodes, and the number of rows and columns.
+    The codes are only valid inside the with block, they are not copied out of the output buffer
+    :param filePath(str): the path to the site map file
+    :param workers(int): number of processes, defaults to the number of CPUs
+    :param chunkSize(int): number of bytes of a range
+    """
+    # Check if the file exists
+    if not os.path.exists(filePath):
+        raise Exception(FILENOTEXIST.format(filePath))
+
+    # Check if read access is provided to the file
+    try:
+        f = open(filePath, "rb")
+    except OSError:
+        raise Exception(READACCESSNOTPROVIDED.format(filePath))
+
+    with f:
+        # Check if the file is empty
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Exception(EMPTYFILE)
+        fileMap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with fileMap:
+        firstLineEnd = fileMap.find(b"\n")
+        firstLine = fileMap[:firstLineEnd] if firstLineEnd >= 0 else fileMap[:]
+        lineBreak = b"\r\n" if firstLine.endswith(b"\r") else b"\n"
+        columns = len(firstLine) - len(lineBreak) + 1
+        ranges = splitLines(fileMap, chunkSize)
+
+    parallel = len(ranges) > 1 and workers != 1
+    pool = None
+    sharedOutput = None
+    codes = None
+    try:
+        if parallel:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                     initargs=(filePath, None)) as countingPool:
+                lineCounts = list(countingPool.map(_countLines, ranges))
+        else:
+            _initWorker(filePath, None)
+            lineCounts = [_countLines(task) for task in ranges]
+        rows = sum(lineCounts)
+
+        tasks = []
+        firstRow = 0
+        for (start, end), count in zip(ranges, lineCounts):
+            tasks.append((start, end, firstRow, count, columns, lineBreak))
+            firstRow += count
+
+        # The processes of the second pool write to an output buffer shared with this process
+        if parallel and rows * columns > 0:
+            sharedOutput = shared_memory.SharedMemory(create=True, size=rows * columns)
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                       initargs=(filePath, sharedOutput.name))
+            results = list(pool.map(_decodeChunk, tasks))
+            codes = sharedOutput.buf[:rows * columns]
+        else:
+            _releaseWorker()
+            output = bytearray(rows * columns)
+            _initWorker(filePath, output)
+            results = [_decodeChunk(task) for task in tasks]
+            codes = output
+
+        errorCount = sum(count for count, _ in results)
+        if errorCount:
+            errors = sorted((error for _, chunkErrors in results for error in chunkErrors),
+                            key=lambda error: (error[0], error[1]))
+            messages = [message for _, _, message in errors[:maxErrors]]
+            if errorCount > maxErrors:
+                messages.append("...")
+            raise Exception(SITEMAPERRORS.format(errorCount, "\n".join(messages)))
+
+        yield codes, rows, columns
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if sharedOutput is not None:
+            # The view of the output buffer has to be released before the buffer is closed
+            if codes is not None:
+                codes.release()
+            sharedOutput.close()
+            sharedOutput.unlink()
+        _releaseWorker()
+
+
+def loadCodes(filePath, workers=None, chunkSize=defaultChunkSize):
+    """
+    Reads, checks and decodes a site map file with a pool of processes, see decodedCodes
+    Returns a copy of the square block codes, and the number of rows and columns
+    :param filePath(str): the path to the site map file
+    :param workers(int): number of processes, defaults to the number of CPUs
+    :param chunkSize(int): number of bytes of a range
+    :rtype: tuple
+    """
+    with decodedCodes(filePath, workers, chunkSize) as (codes, rows, columns):
+        return bytearray(codes), rows, columns
+
+
+def loadSiteMapParallel(filePath, workers=None, chunkSize=defaultChunkSize):
+    """
+    Reads a site map file with a pool of processes, see decodedCodes
+    The site map is built straight from the output buffer of the processes
+    :param filePath(str): the path to the site map file
+    :param workers(int): number of processes, defaults to the number of CPUs
+    :param chunkSize(int): number of bytes of a range
+    :rtype: SiteMap
+    """
+    with decodedCodes(filePath, workers, chunkSize) as (codes, rows, columns):
+        return SiteMap.fromCodes(codes, rows, columns)
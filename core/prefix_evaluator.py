@@ -0,0 +1,232 @@
+# Evaluation of many command scripts on one site map, sharing their common prefixes
+# The scripts are merged into a trie of commands, in which every edge is a command and
+# every path from the root is a prefix of at least one script. The trie is walked depth
+# first with a single Bulldozer, so each edge, and thus each shared prefix, is executed once.
+# The state of the bulldozer is saved only at the nodes where scripts diverge, as its
+# location, direction, costs, length of the command history and position in the log of
+# cleared square blocks. After each branch the bulldozer is rolled back to that state by
+# restoring the square blocks cleared since then. Nodes are released as their subtrees finish.
+
+from core.site_map import squareTypesByCode
+from core.bulldozer import Location
+from core.replay import RecordingBulldozer
+from core.session import normalizeCommand
+
+
+# dictionary mapping the long forms of the commands to the short ones
+shortCommandMap = {
+    'right': 'r',
+    'left': 'l',
+    'quit': 'q'
+}
+
+
+def canonicalCommand(commandStr):
+    """
+    Converts a valid simulator command to its short form, so that scripts typing the
+    same command differently share their trie edges
+    The number of squares of an advance is kept as written, as it appears in the command history
+    :param commandStr(str): a valid simulator command
+    :rtype: str
+    """
+    commandStr = normalizeCommand(commandStr)
+    if commandStr[0] == 'a':
+        return "a " + commandStr.split()[1]
+    return shortCommandMap.get(commandStr, commandStr)
+
+
+class TrieNode(object):
+    """
+    This class represents a node of the command trie, the state after a prefix of scripts
+    """
+
+    def __init__(self):
+        # dictionary mapping the next command to the child node
+        self.children = {}
+        # indexes of the scripts ending at this node
+        self.scripts = []
+
+
+class CommandTrie(object):
+    """
+    This class represents the trie of the command scripts of a site map
+    """
+
+    def __init__(self, scripts=()):
+        """
+        :param scripts(list): lists of valid simulator commands
+        """
+        self.root = TrieNode()
+        self.scriptCount = 0
+        self.commandCount = 0
+        self.edgeCount = 0
+        for commands in scripts:
+            self.addScript(commands)
+
+    def addScript(self, commands):
+        """
+        Adds a script to the trie and returns its index
+        :param commands(list): valid simulator commands
+        :rtype: int
+        """
+        node = self.root
+        for commandStr in commands:
+            commandStr = canonicalCommand(commandStr)
+            child = node.children.get(commandStr)
+            if child is None:
+                child = node.children[commandStr] = TrieNode()
+                self.edgeCount += 1
+            node = child
+        node.scripts.append(self.scriptCount)
+        self.scriptCount += 1
+        self.commandCount += len(commands)
+        return self.scriptCount - 1
+
+
+class ScriptResult(object):
+    """
+    This class holds the outcome of a script
+    It has the same attributes as SessionResult for the final state and expenses
+    """
+
+    def __init__(self, location, direction, costQuantity, commandCount, terminationReason):
+        """
+        :param location(Location): the final location of the bulldozer
+        :param direction(Direction): the final direction of the bulldozer
+        :param costQuantity(dict): quantity of each cost item
+        :param commandCount(int): number of executed commands, the ones after a termination are not executed
+        :param terminationReason(str): the message of the termination, None if the script ran out of commands
+        """
+        self.location = location
+        self.direction = direction
+        self.costQuantity = costQuantity
+        self.commandCount = commandCount
+        self.terminationReason = terminationReason
+
+    def getCommandCount(self):
+        """
+        Returns the number of commands the bulldozer has executed
+        :rtype: int
+        """
+        return self.commandCount
+
+
+class PrefixEvaluator(object):
+    """
+    This class evaluates all the scripts of a command trie on a site map
+    """
+
+    def __init__(self, siteMap, trie):
+        """
+        :param siteMap(SiteMap): the site map, it is not modified
+        :param trie(CommandTrie): the scripts to evaluate, the trie is consumed by the evaluation
+        """
+        self.siteMap = siteMap
+        self.trie = trie
+        # number of commands executed by the bulldozer during the evaluation
+        self.executedCommands = 0
+
+    def _getState(self, bulldozer):
+        """
+        Returns the state the bulldozer can be rolled back to
+        """
+        return (bulldozer.location.row, bulldozer.location.column, bulldozer.direction,
+                dict(bulldozer.expense.costQuantity), len(bulldozer.history), len(bulldozer.clearedLog))
+
+    def _rollBack(self, bulldozer, state):
+        """
+        Rolls the bulldozer and its site map back to the given state
+        """
+        row, column, direction, costQuantity, historyLength, logLength = state
+        siteMap = bulldozer.siteMap
+        clearedLog = bulldozer.clearedLog
+        for index, code in reversed(clearedLog[logLength:]):
+            siteMap.setSquare(index // siteMap.columns, index % siteMap.columns, squareTypesByCode[code])
+        del clearedLog[logLength:]
+        del bulldozer.history[historyLength:]
+        bulldozer.location = Location(row, column)
+        bulldozer.direction = direction
+        bulldozer.expense.costQuantity = dict(costQuantity)
+
+    def _record(self, results, node, bulldozer, terminationReason=None):
+        """
+        Records the current state as the result of the scripts ending at the node
+        If the bulldozer terminated, it is also the result of every script below the node
+        """
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            for script in node.scripts:
+                results[script] = ScriptResult(Location(bulldozer.location.row, bulldozer.location.column),
+                                               bulldozer.direction, dict(bulldozer.expense.costQuantity),
+                                               len(bulldozer.history), terminationReason)
+            if terminationReason is not None:
+                nodes.extend(node.children.values())
+
+    def _apply(self, bulldozer, commandStr):
+        """
+        Applies a command and returns the termination message, None if the bulldozer goes on
+        """
+        self.executedCommands += 1
+        try:
+            bulldozer.applyCommand(commandStr)
+        except Exception as e:
+            return str(e)
+        return None
+
+    def evaluate(self):
+        """
+        Evaluates every script of the trie
+        Returns the list of ScriptResults, in the order the scripts were added to the trie
+        :rtype: list
+        """
+        results = [None] * self.trie.scriptCount
+        # The scripts run on a copy of the site map, a sparse site map is copied without its plain land
+        bulldozer = RecordingBulldozer(self.siteMap.copy())
+        # Each branch holds the remaining children of a node where scripts diverge,
+        # and the state to roll back to before each of them
+        branches = []
+        node = self.trie.root
+        self.trie.root = None
+        while node is not None:
+            self._record(results, node, bulldozer)
+            children = node.children
+            node.children = None
+            nextNode = None
+            if len(children) == 1:
+                # Scripts do not diverge here, so no state is saved
+                commandStr, child = children.popitem()
+                terminationReason = self._apply(bulldozer, commandStr)
+                if terminationReason is None:
+                    nextNode = child
+                else:
+                    self._record(results, child, bulldozer, terminationReason)
+            elif len(children) > 1:
+                branches.append((list(children.items()), self._getState(bulldozer)))
+
+            # Go down the next branch, rolling back to the state saved where it starts
+            while nextNode is None and branches:
+                remaining, state = branches[-1]
+                if len(remaining) == 1:
+                    # The parents of the last branch save their own states, so this one is released
+                    branches.pop()
+                commandStr, child = remaining.pop()
+                self._rollBack(bulldozer, state)
+                terminationReason = self._apply(bulldozer, commandStr)
+                if terminationReason is None:
+                    nextNode = child
+                else:
+                    self._record(results, child, bulldozer, terminationReason)
+            node = nextNode
+        return results
+
+
+def evaluateScripts(siteMap, scripts):
+    """
+    Evaluates command scripts on a site map, executing their common prefixes once
+    Returns the list of ScriptResults, in the order of the scripts
+    :param siteMap(SiteMap): the site map, it is not modified
+    :param scripts(list): lists of valid simulator commands
+    :rtype: list
+    """
+    return PrefixEvaluator(siteMap, CommandTrie(scripts)).evaluate()
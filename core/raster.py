@@ -0,0 +1,258 @@
+# Writes raster images of site maps and of per-square statistics
+# Images are NumPy arrays of shape (rows, columns, 3) holding 8-bit RGB values,
+# and are written as PNG (using zlib from the standard library) or as binary PPM
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from core.site_map import SquareType, squareTypesByCode
+from core.session import replaySession
+
+
+def writePng(filePath, pixels, compression=6):
+    """
+    Writes an RGB image to a PNG file
+    :param filePath(str): the path to the output file
+    :param pixels(numpy.ndarray): uint8 array of shape (height, width, 3)
+    :param compression(int): zlib compression level, from 1 (fastest) to 9 (smallest)
+    """
+    height, width = pixels.shape[:2]
+    # Every scanline starts with a filter type byte, 0 meaning no filter
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = pixels.reshape(height, width * 3)
+
+    def chunk(chunkType, data):
+        return struct.pack(">I", len(data)) + chunkType + data + \
+            struct.pack(">I", zlib.crc32(chunkType + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    with open(filePath, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", header))
+        f.write(chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compression)))
+        f.write(chunk(b"IEND", b""))
+
+
+def writePpm(filePath, pixels):
+    """
+    Writes an RGB image to a binary PPM file
+    :param filePath(str): the path to the output file
+    :param pixels(numpy.ndarray): uint8 array of shape (height, width, 3)
+    """
+    height, width = pixels.shape[:2]
+    with open(filePath, "wb") as f:
+        f.write("P6\n{} {}\n255\n".format(width, height).encode("ascii"))
+        f.write(np.ascontiguousarray(pixels, dtype=np.uint8).tobytes())
+
+
+def writeImage(filePath, pixels, compression=6):
+    """
+    Writes an RGB image, as PPM if the file name ends with .ppm and as PNG otherwise
+    :param filePath(str): the path to the output file
+    :param pixels(numpy.ndarray): uint8 array of shape (height, width, 3)
+    :param compression(int): zlib compression level of PNG files
+    """
+    if filePath.lower().endswith(".ppm"):
+        writePpm(filePath, pixels)
+    else:
+        writePng(filePath, pixels, compression)
+
+
+# colours of the heat scale, from no activity to the highest count
+heatScale = np.array([
+    [0, 0, 0],
+    [48, 18, 120],
+    [190, 40, 90],
+    [250, 140, 30],
+    [255, 255, 200]
+], dtype=np.float64)
+
+
+def heatColours(counts):
+    """
+    Converts a 2-D array of counts to heat map colours
+    Counts are shown on a logarithmic scale so that rarely visited squares stay visible
+    :param counts(numpy.ndarray): 2-D array of non-negative counts
+    :rtype: numpy.ndarray
+    """
+    levels = np.log1p(counts.astype(np.float64))
+    highest = levels.max() if levels.size else 0
+    if highest > 0:
+        levels /= highest
+    position = levels * (len(heatScale) - 1)
+    lower = np.minimum(position.astype(np.intp), len(heatScale) - 2)
+    weight = (position - lower)[..., np.newaxis]
+    colours = heatScale[lower] * (1 - weight) + heatScale[lower + 1] * weight
+    return np.rint(colours).astype(np.uint8)
+
+
+def upscale(pixels, factor):
+    """
+    Enlarges an image by repeating every pixel factor times in both directions
+    :param pixels(numpy.ndarray): uint8 array of shape (height, width, 3)
+    :param factor(int): the number of pixels per square block
+    :rtype: numpy.ndarray
+    """
+    if factor <= 1:
+        return pixels
+    return np.repeat(np.repeat(pixels, factor, axis=0), factor, axis=1)
+
+
+# dictionary mapping square block types to their colours
+squarePalette = {
+    SquareType.PLAIN: (222, 205, 150),
+    SquareType.ROCK: (128, 128, 128),
+    SquareType.REMOVABLE_TREE: (90, 170, 70),
+    SquareType.NONREMOVABLE_TREE: (20, 80, 30),
+    SquareType.CLEAR: (250, 250, 245)
+}
+
+# colours of the path of the bulldozer and of its location
+pathColour = np.array([220, 60, 40], dtype=np.uint8)
+bulldozerColour = np.array([30, 60, 220], dtype=np.uint8)
+
+# colours indexed by square block code
+paletteByCode = np.array([squarePalette[sqType] for sqType in squareTypesByCode], dtype=np.uint8)
+
+# When several square blocks are shown by one pixel, the one with the highest priority is shown,
+# so that trees and rocks stay visible on downscaled images of large sites
+squarePriority = {
+    SquareType.CLEAR: 0,
+    SquareType.PLAIN: 1,
+    SquareType.ROCK: 2,
+    SquareType.REMOVABLE_TREE: 3,
+    SquareType.NONREMOVABLE_TREE: 4
+}
+priorityByCode = np.array([squarePriority[sqType] for sqType in squareTypesByCode], dtype=np.uint8)
+codeByPriority = np.argsort(priorityByCode).astype(np.uint8)
+
+
+def _downscale(grid, factor, reduce):
+    """
+    Reduces every factor by factor block of a 2-D array to one value
+    The array is padded with zeros to a multiple of factor
+    """
+    rows, columns = grid.shape
+    paddedRows = -(-rows // factor) * factor
+    paddedColumns = -(-columns // factor) * factor
+    if (paddedRows, paddedColumns) != grid.shape:
+        padded = np.zeros((paddedRows, paddedColumns), dtype=grid.dtype)
+        padded[:rows, :columns] = grid
+        grid = padded
+    blocks = grid.reshape(paddedRows // factor, factor, paddedColumns // factor, factor)
+    return reduce(blocks, axis=(1, 3))
+
+
+def siteImage(codes, rows, columns, path=None, location=None, downscale=1, scale=1):
+    """
+    Converts square block codes to an RGB image, one pixel per square block
+    :param codes(bytes): row-major square block codes of the site map
+    :param rows(int): number of rows of the site map
+    :param columns(int): number of columns of the site map
+    :param path(numpy.ndarray): 2-D boolean array of the square blocks the bulldozer went through
+    :param location(Location): location of the bulldozer, not shown if outside of the site
+    :param downscale(int): number of square blocks per pixel in each direction
+    :param scale(int): number of pixels per square block in each direction, for small sites
+    :rtype: numpy.ndarray
+    """
+    grid = np.frombuffer(bytes(codes), dtype=np.uint8).reshape(rows, columns)
+    if location is not None and 0 <= location.row < rows and 0 <= location.column < columns:
+        marker = np.zeros((rows, columns), dtype=bool)
+        marker[location.row, location.column] = True
+    else:
+        marker = None
+
+    if downscale > 1:
+        grid = np.take(codeByPriority, _downscale(np.take(priorityByCode, grid), downscale, np.max))
+        if path is not None:
+            path = _downscale(path, downscale, np.any)
+        if marker is not None:
+            marker = _downscale(marker, downscale, np.any)
+
+    # np.take is much faster than fancy indexing for a lookup table this small
+    pixels = np.take(paletteByCode, grid, axis=0)
+    if path is not None:
+        pixels[path] = pathColour
+    if marker is not None:
+        pixels[marker] = bulldozerColour
+    return upscale(pixels, scale)
+
+
+def exportCodes(codes, rows, columns, filePath, commands=None, downscale=1, scale=1, compression=1):
+    """
+    Writes an image of a site map given as row-major square block codes, as returned by SiteMap.toCodes,
+    as PPM if the file name ends with .ppm and as PNG otherwise
+    If commands are given, the site map is shown after them, with the path of the bulldozer,
+    and the square blocks they clear are cleared in the codes
+    :param codes(bytearray): the square block codes
+    :param rows(int): number of rows of the sitemap
+    :param columns(int): number of columns of the sitemap
+    :param filePath(str): the path to the output image
+    :param commands(list): valid simulator commands applied to the site map
+    :param downscale(int): number of square blocks per pixel in each direction
+    :param scale(int): number of pixels per square block in each direction
+    :param compression(int): zlib compression level of PNG files
+    """
+    path = None
+    location = None
+    if commands:
+        result = replaySession(codes, rows, columns, commands)
+        for index in result.cleared:
+            codes[index] = SquareType.CLEAR.value
+        path = np.zeros(rows * columns, dtype=bool)
+        path[np.asarray(result.visits, dtype=np.intp)] = True
+        path = path.reshape(rows, columns)
+        location = result.location
+    writeImage(filePath, siteImage(codes, rows, columns, path, location, downscale, scale), compression)
+
+
+def exportSite(siteMap, filePath, commands=None, downscale=1, scale=1, compression=1):
+    """
+    Writes an image of a site map, as PPM if the file name ends with .ppm and as PNG otherwise
+    If commands are given, the site map is shown after them, with the path of the bulldozer
+    :param siteMap(SiteMap): the site map
+    :param filePath(str): the path to the output image
+    :param commands(list): valid simulator commands applied to the site map
+    :param downscale(int): number of square blocks per pixel in each direction
+    :param scale(int): number of pixels per square block in each direction
+    :param compression(int): zlib compression level of PNG files
+    """
+    exportCodes(siteMap.toCodes(), siteMap.rows, siteMap.columns, filePath, commands, downscale, scale,
+                compression)
+
+
+def exportSessionFrames(replay, directory, extension="png", downscale=1, scale=1, compression=1):
+    """
+    Writes one image per step of a session replay, frame_00000 showing the site before any command
+    The path of the bulldozer is drawn from its location after each command
+    Returns the list of written files
+    :param replay(SessionReplay): the replay of the session
+    :param directory(str): the output directory
+    :param extension(str): "png" or "ppm"
+    :param downscale(int): number of square blocks per pixel in each direction
+    :param scale(int): number of pixels per square block in each direction
+    :param compression(int): zlib compression level of PNG files
+    :rtype: list
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    path = np.zeros((replay.rows, replay.columns), dtype=bool)
+    filePaths = []
+    previous = None
+    for step in range(replay.getStepCount() + 1):
+        state = replay.seek(step)
+        location = state.location
+        if previous is not None:
+            # Every command moves the bulldozer along a single row or column
+            top, bottom = sorted((previous.row, location.row))
+            left, right = sorted((previous.column, location.column))
+            path[max(top, 0):bottom + 1, max(left, 0):right + 1] = True
+        previous = location
+        filePath = os.path.join(directory, "frame_{:05d}.{}".format(step, extension))
+        writeImage(filePath, siteImage(state.codes, replay.rows, replay.columns, path, location,
+                                       downscale, scale), compression)
+        filePaths.append(filePath)
+    return filePaths
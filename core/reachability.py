@@ -0,0 +1,283 @@
+# Reachability and region analysis of a site map
+# The bulldozer enters the site at the top left corner, moving east from (0, -1), and can
+# move through every square block except protected trees. Clearable square blocks cut off
+# from the entry point by protected trees can never be cleared, and always count as uncleared.
+#
+# Connected regions are found over horizontal runs of passable square blocks instead of over
+# single square blocks: the runs are extracted with NumPy, a block of rows at a time, runs of
+# neighbouring rows that share a column are linked, and the runs are joined by a vectorized
+# union-find, hooking the larger root of every link onto the smaller one and compressing the
+# paths, until no link joins two roots. All the arrays are NumPy arrays of 32-bit integers when
+# the site is small enough, so the memory used stays a few bytes per square block.
+#
+# Chokepoints are the articulation points of the reachable region: the square blocks without
+# which some reachable square blocks could no longer be reached from others. They are found on
+# demand, with an iterative depth-first search over the square blocks of the reachable region.
+
+from array import array
+
+import numpy as np
+
+from core.site_map import SquareType
+from core.expense import CostItem, costPerQuantity
+
+
+# number of square blocks of the row blocks in which runs are extracted and labels painted
+blockSize = 1 << 22
+
+
+class RegionAnalysis(object):
+    """
+    This class labels the connected regions of passable square blocks of a site map
+    and flags the clearable square blocks that cannot be reached and the chokepoints
+    Region labels start at 1, in the order of their first square block, protected trees have label 0
+    """
+
+    def __init__(self, siteMap):
+        """
+        Analyses the given site map
+        :param siteMap(SiteMap): the site map to analyse
+        """
+        self.analyse(siteMap.toCodes(), siteMap.rows, siteMap.columns)
+
+    @classmethod
+    def fromCodes(cls, codes, rows, columns):
+        """
+        Analyses a site map given as row-major square block codes, as returned by SiteMap.toCodes
+        :param codes(bytes): the square block codes
+        :param rows(int): number of rows of the sitemap
+        :param columns(int): number of columns of the sitemap
+        :rtype: RegionAnalysis
+        """
+        analysis = cls.__new__(cls)
+        analysis.analyse(codes, rows, columns)
+        return analysis
+
+    def analyse(self, codes, rows, columns):
+        """
+        Labels the regions of the site map and finds its unreachable square blocks
+        :param codes(bytes): the square block codes
+        :param rows(int): number of rows of the sitemap
+        :param columns(int): number of columns of the sitemap
+        """
+        self.rows = rows
+        self.columns = columns
+        codes = np.frombuffer(codes, dtype=np.uint8).reshape(rows, columns)
+        passable = codes != SquareType.NONREMOVABLE_TREE.value
+        clearable = (codes == SquareType.PLAIN.value) | \
+            (codes == SquareType.ROCK.value) | \
+            (codes == SquareType.REMOVABLE_TREE.value)
+
+        self.labels, self.regionCount = self.labelRegions(passable)
+        del passable
+        # Number of square blocks of each region, indexed by label
+        self.regionSizes = np.bincount(self.labels.ravel(), minlength=self.regionCount + 1)
+        self.regionSizes[0] = 0
+        self.entryRegion = int(self.labels[0, 0])
+        if self.entryRegion:
+            self.reachable = self.labels == self.entryRegion
+        else:
+            self.reachable = np.zeros((self.rows, self.columns), dtype=bool)
+        self.unreachable = clearable & ~self.reachable
+        # 2-D boolean array of the chokepoints, None until they are found
+        self.chokepoints = None
+
+    def labelRegions(self, passable):
+        """
+        Labels the 4-connected regions of passable square blocks
+        Returns the 2-D array of labels and the number of regions
+        :param passable(numpy.ndarray): 2-D boolean array of the passable square blocks
+        :rtype: tuple
+        """
+        rows, columns = passable.shape
+        labels = np.zeros((rows, columns), dtype=np.int32)
+        # Positions are counted in rows of columns + 1 square blocks, the last one always blocked,
+        # so that a run ends on its own row
+        width = columns + 1
+        indexType = np.int32 if rows * width < 2 ** 31 else np.int64
+        blockRows = max(1, blockSize // width)
+
+        # Start and end (excluded) positions of the horizontal runs, sorted by row and then by column.
+        # Runs start and end where a square block differs from the one before it, alternately.
+        # Every run is linked to the runs of the row above it that it overlaps, through the square
+        # blocks that start an overlap: passable with the one above them, unlike the one before them.
+        # The first row of the block buffers holds the last row of the previous block
+        starts = []
+        ends = []
+        sources = []
+        targets = []
+        runCount = 0
+        # index of the first run of every block
+        runOffsets = [0]
+        padded = np.zeros((blockRows + 1, columns + 2), dtype=bool)
+        runIndexes = np.zeros((blockRows + 1, width), dtype=indexType)
+        for top in range(0, rows, blockRows):
+            count = len(passable[top:top + blockRows])
+            padded[1:count + 1, 1:-1] = passable[top:top + blockRows]
+            current = padded[1:count + 1]
+            changes = np.flatnonzero(current[:, 1:] != current[:, :-1]).astype(indexType)
+            blockStarts = changes[0::2]
+
+            # Index of the run of every passable square block of the block
+            blockIndexes = runIndexes[1:count + 1].reshape(-1)
+            blockIndexes[...] = 0
+            blockIndexes[blockStarts] = 1
+            np.cumsum(blockIndexes, out=blockIndexes)
+            blockIndexes += runCount - 1
+
+            overlaps = padded[1:count + 1, 1:] & padded[:count, 1:]
+            overlaps[:, 1:] &= ~overlaps[:, :-1].copy()
+            overlapStarts = np.flatnonzero(overlaps)
+            sources.append(blockIndexes[overlapStarts])
+            targets.append(runIndexes[:count].reshape(-1)[overlapStarts])
+
+            starts.append(blockStarts + top * width)
+            ends.append(changes[1::2] + top * width)
+            runCount += len(blockStarts)
+            runOffsets.append(runCount)
+            padded[0] = padded[count]
+            runIndexes[0] = runIndexes[count]
+        del padded, runIndexes
+        starts = np.concatenate(starts)
+        ends = np.concatenate(ends)
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        linkCount = len(sources)
+        if runCount == 0:
+            return labels, 0
+
+        # Union-find over the runs: every root keeps the smallest run of its region
+        parents = np.arange(runCount, dtype=indexType)
+        while linkCount:
+            sourceRoots = parents[sources]
+            targetRoots = parents[targets]
+            joining = sourceRoots != targetRoots
+            # Links inside a region are never needed again
+            sources = sources[joining]
+            targets = targets[joining]
+            linkCount = len(sources)
+            if not linkCount:
+                break
+            sourceRoots = sourceRoots[joining]
+            targetRoots = targetRoots[joining]
+            np.minimum.at(parents, np.maximum(sourceRoots, targetRoots), np.minimum(sourceRoots, targetRoots))
+            # Compress the paths, so that every run points to its root
+            while True:
+                grandparents = parents[parents]
+                if np.array_equal(grandparents, parents):
+                    break
+                parents = grandparents
+        del sources, targets
+
+        # Roots are numbered in the order of the runs, which is the order of their first square block
+        roots = parents == np.arange(runCount, dtype=indexType)
+        regionCount = int(roots.sum())
+        runLabels = np.cumsum(roots, dtype=np.int32)[parents]
+        del parents, roots
+
+        # Paint the label of each run on its square blocks, a block of rows at a time:
+        # a run ends on a blocked square block, so starts and ends never share a position
+        marks = np.zeros((blockRows, width), dtype=np.int32)
+        for top, firstRun, lastRun in zip(range(0, rows, blockRows), runOffsets, runOffsets[1:]):
+            bottom = min(top + blockRows, rows)
+            flatMarks = marks[:bottom - top].reshape(-1)
+            flatMarks[...] = 0
+            flatMarks[starts[firstRun:lastRun] - top * width] = runLabels[firstRun:lastRun]
+            flatMarks[ends[firstRun:lastRun] - top * width] = -runLabels[firstRun:lastRun]
+            np.cumsum(flatMarks, out=flatMarks)
+            labels[top:bottom] = marks[:bottom - top, :columns]
+        return labels, regionCount
+
+    def findChokepoints(self):
+        """
+        Flags the articulation points of the reachable region, with an iterative depth-first search
+        from the entry point that keeps, for every square block, the earliest square block
+        reachable from its subtree without going through its parent
+        :rtype: numpy.ndarray
+        """
+        rows, columns = self.rows, self.columns
+        size = rows * columns
+        chokepoints = np.zeros(size, dtype=bool)
+        if not self.entryRegion:
+            return chokepoints.reshape(rows, columns)
+
+        inRegion = self.reachable.tobytes()
+        # Order in which the square blocks are discovered, from 1, and the earliest one reachable
+        discovery = array("i", bytes(4 * size))
+        low = array("i", bytes(4 * size))
+        discovery[0] = low[0] = 1
+        counter = 1
+        rootChildren = 0
+        cellStack = [0]
+        directionStack = [0]
+        while cellStack:
+            cell = cellStack[-1]
+            direction = directionStack[-1]
+            if direction < 4:
+                directionStack[-1] = direction + 1
+                if direction == 0:
+                    neighbour = cell - columns
+                elif direction == 1:
+                    neighbour = cell + columns if cell + columns < size else -1
+                elif direction == 2:
+                    neighbour = cell - 1 if cell % columns else -1
+                else:
+                    neighbour = cell + 1 if (cell + 1) % columns else -1
+                if neighbour < 0 or not inRegion[neighbour]:
+                    continue
+                if not discovery[neighbour]:
+                    counter += 1
+                    discovery[neighbour] = low[neighbour] = counter
+                    cellStack.append(neighbour)
+                    directionStack.append(0)
+                elif len(cellStack) < 2 or neighbour != cellStack[-2]:
+                    if discovery[neighbour] < low[cell]:
+                        low[cell] = discovery[neighbour]
+            else:
+                cellStack.pop()
+                directionStack.pop()
+                if not cellStack:
+                    break
+                parent = cellStack[-1]
+                if low[cell] < low[parent]:
+                    low[parent] = low[cell]
+                if len(cellStack) == 1:
+                    rootChildren += 1
+                elif low[cell] >= discovery[parent]:
+                    chokepoints[parent] = True
+        # The entry point is an articulation point if the search left it more than once
+        chokepoints[0] = rootChildren > 1
+        return chokepoints.reshape(rows, columns)
+
+    def isReachable(self, row, column):
+        """
+        Determines if the bulldozer can reach the given square block without hitting a protected tree
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :rtype: bool
+        """
+        return bool(self.reachable[row, column])
+
+    def getUnreachableSquares(self):
+        """
+        Returns the number of clearable square blocks that can never be cleared
+        :rtype: int
+        """
+        return int(self.unreachable.sum())
+
+    def getUnreachableCost(self):
+        """
+        Returns the uncleared square cost that no sequence of commands can avoid
+        :rtype: int
+        """
+        return self.getUnreachableSquares() * costPerQuantity[CostItem.UNCLEARD_SQUARE]
+
+    def getChokepoints(self):
+        """
+        Returns the (row, column) of every chokepoint of the reachable region
+        The chokepoints are found on the first call
+        :rtype: list
+        """
+        if self.chokepoints is None:
+            self.chokepoints = self.findChokepoints()
+        return [tuple(point) for point in np.argwhere(self.chokepoints).tolist()]
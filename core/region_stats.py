@@ -0,0 +1,240 @@
+# Counts of square block types over rectangular zones of a site map
+# For each type of square block except plain land, a summed-area table holds at (r, c) the number
+# of square blocks of that type in rows 0..r-1 and columns 0..c-1, so the count in any rectangle is
+# found from four entries of the table. Plain land is counted as the rest of the rectangle.
+#
+# When the site map changes, the changed square blocks are kept aside with the type they had
+# when the tables were built, and counts are corrected with them. The tables are built again,
+# with NumPy, on the first count after more than rebuildThreshold square blocks have changed.
+#
+# The tables are dense whatever the site map: a copy of the square block codes and four tables
+# of 32-bit integers, about 17 bytes per square block, so counting the zones of a SparseSiteMap
+# uses memory proportional to the area of the site, not to its obstacles.
+#
+# A zone file defines named rectangles of a site map, one per line, as
+#   <name> <top row> <left column> <bottom row> <right column>
+# with rows and columns counted from 0 and both corners included. Blank lines and lines
+# starting with '#' are ignored.
+
+from os import path
+
+import numpy as np
+
+from core.site_map import SquareType, squareTypesByCode
+from core.expense import CostItem, costPerQuantity
+from core.simulator_exceptions import (
+    FILENOTEXIST,
+    READACCESSNOTPROVIDED,
+    INVALIDZONE
+)
+
+
+# square block codes that have a summed-area table, plain land is counted as the rest of a rectangle
+tableCodes = [sqType.value for sqType in squareTypesByCode if sqType != SquareType.PLAIN]
+
+# square block types counted as uncleared squares
+unclearedTypes = [SquareType.PLAIN, SquareType.ROCK, SquareType.REMOVABLE_TREE]
+
+
+class Zone(object):
+    """
+    This class represents a named rectangle of a site map, both corners included
+    """
+
+    def __init__(self, name, top, left, bottom, right):
+        self.name = name
+        self.top = top
+        self.left = left
+        self.bottom = bottom
+        self.right = right
+
+    def contains(self, row, column):
+        """
+        Determines if the given row and column is in the zone
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :rtype: bool
+        """
+        return self.top <= row <= self.bottom and self.left <= column <= self.right
+
+
+def readZoneFile(filePath):
+    """
+    Reads the zones of a site map from file
+    Returns the list of Zones, in the order of the file
+    :param filePath(str): the path to the zone file
+    :rtype: list
+    """
+    if not path.exists(filePath):
+        raise Exception(FILENOTEXIST.format(filePath))
+
+    try:
+        with open(filePath, "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        raise Exception(READACCESSNOTPROVIDED.format(filePath))
+
+    zones = []
+    for lineNumber, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        fields = line.split()
+        try:
+            if len(fields) != 5:
+                raise ValueError(line)
+            top, left, bottom, right = [int(field) for field in fields[1:]]
+        except ValueError:
+            raise Exception(INVALIDZONE.format(lineNumber, line))
+        if top < 0 or left < 0 or bottom < top or right < left:
+            raise Exception(INVALIDZONE.format(lineNumber, line))
+        zones.append(Zone(fields[0], top, left, bottom, right))
+    return zones
+
+
+class RegionStats(object):
+    """
+    This class counts the square blocks of each type in rectangles of a site map
+    Once attached with SiteMap.attachRegionStats, it is kept up to date by the site map as square blocks are cleared
+    """
+
+    def __init__(self, siteMap, rebuildThreshold=65536):
+        """
+        Builds the summed-area tables of the site map
+        A SparseSiteMap is converted to dense codes first
+        :param siteMap(SiteMap): the site map
+        :param rebuildThreshold(int): number of changed square blocks above which the tables are built again
+        """
+        self.rows = siteMap.rows
+        self.columns = siteMap.columns
+        self.rebuildThreshold = rebuildThreshold
+        self.codes = np.frombuffer(bytes(siteMap.toCodes()), dtype=np.uint8).reshape(self.rows, self.columns).copy()
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Builds the summed-area tables from the current square blocks
+        """
+        dtype = np.int32 if self.rows * self.columns < 2 ** 31 else np.int64
+        # dictionary mapping the square block codes to their summed-area tables
+        self.tables = {}
+        for code in tableCodes:
+            table = self.tables[code] = np.zeros((self.rows + 1, self.columns + 1), dtype=dtype)
+            inner = table[1:, 1:]
+            inner[...] = self.codes == code
+            np.add.accumulate(inner, axis=1, out=inner)
+            np.add.accumulate(inner, axis=0, out=inner)
+        # dictionary mapping the row-major index of every changed square block to its code in the tables
+        self.changed = {}
+        # arrays of the rows, columns and codes in the tables of the changed square blocks, None when outdated
+        self.changedArrays = None
+
+    def changeSquare(self, row, column, oldType, newType):
+        """
+        Records a change of a square block, called by the site map
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :param oldType(SquareType): the type of the square block before the change
+        :param newType(SquareType): the type of the square block after the change
+        """
+        index = row * self.columns + column
+        if index not in self.changed:
+            self.changed[index] = oldType.value
+            self.changedArrays = None
+        self.codes[row, column] = newType.value
+
+    def _clip(self, top, left, bottom, right):
+        """
+        Clips a rectangle to the site map, returns None if they do not overlap
+        """
+        top = max(top, 0)
+        left = max(left, 0)
+        bottom = min(bottom, self.rows - 1)
+        right = min(right, self.columns - 1)
+        if top > bottom or left > right:
+            return None
+        return top, left, bottom, right
+
+    def getCounts(self, top, left, bottom, right):
+        """
+        Returns the number of square blocks of each type in a rectangle, both corners included
+        The parts of the rectangle outside of the site map are ignored
+        :param top(int): the first row
+        :param left(int): the first column
+        :param bottom(int): the last row
+        :param right(int): the last column
+        :rtype: dict
+        """
+        counts = dict((sqType, 0) for sqType in squareTypesByCode)
+        rectangle = self._clip(top, left, bottom, right)
+        if rectangle is None:
+            return counts
+        top, left, bottom, right = rectangle
+        if len(self.changed) > self.rebuildThreshold:
+            self.rebuild()
+
+        tables = self.tables
+        for code in tableCodes:
+            table = tables[code]
+            counts[squareTypesByCode[code]] = int(table[bottom + 1, right + 1] - table[top, right + 1] -
+                                                  table[bottom + 1, left] + table[top, left])
+        if self.changed:
+            # Count the changed square blocks in the rectangle with their types in the tables and now
+            if self.changedArrays is None:
+                indexes = np.fromiter(self.changed.keys(), dtype=np.int64, count=len(self.changed))
+                self.changedArrays = (indexes // self.columns, indexes % self.columns,
+                                      np.fromiter(self.changed.values(), dtype=np.uint8, count=len(self.changed)))
+            rows, columns, oldCodes = self.changedArrays
+            inside = (rows >= top) & (rows <= bottom) & (columns >= left) & (columns <= right)
+            corrections = np.bincount(self.codes[rows[inside], columns[inside]], minlength=len(squareTypesByCode)) - \
+                np.bincount(oldCodes[inside], minlength=len(squareTypesByCode))
+            for code in tableCodes:
+                counts[squareTypesByCode[code]] += int(corrections[code])
+
+        area = (bottom - top + 1) * (right - left + 1)
+        counts[SquareType.PLAIN] = area - sum(counts.values())
+        return counts
+
+    def countSquares(self, sqType, top, left, bottom, right):
+        """
+        Returns the number of square blocks of a type in a rectangle, both corners included
+        :param sqType(SquareType): the type of the square blocks
+        :param top(int): the first row
+        :param left(int): the first column
+        :param bottom(int): the last row
+        :param right(int): the last column
+        :rtype: int
+        """
+        return self.getCounts(top, left, bottom, right)[sqType]
+
+    def getZoneCounts(self, zone):
+        """
+        Returns the number of square blocks of each type in a zone
+        :param zone(Zone): the zone
+        :rtype: dict
+        """
+        return self.getCounts(zone.top, zone.left, zone.bottom, zone.right)
+
+    def getUnclearedSquares(self, zone):
+        """
+        Returns the number of uncleared square blocks in a zone, not including the protected trees
+        :param zone(Zone): the zone
+        :rtype: int
+        """
+        counts = self.getZoneCounts(zone)
+        return sum(counts[sqType] for sqType in unclearedTypes)
+
+
+def generateZoneReport(regionStats, zones):
+    """
+    Shows the uncleared squares, and their cost, of each zone on the console
+    Zones may overlap, a square block is then counted in each of them
+    :param regionStats(RegionStats): the counts of the site map
+    :param zones(list): the Zones
+    """
+    report = [["Zone", "Uncleared squares", "Cost"]]
+    for zone in zones:
+        uncleared = regionStats.getUnclearedSquares(zone)
+        report.append([zone.name, uncleared, uncleared * costPerQuantity[CostItem.UNCLEARD_SQUARE]])
+
+    for args in (report):
+        print('{0:<30} {1:>20} {2:>20}'.format(*args))
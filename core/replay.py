@@ -0,0 +1,174 @@
+# Random-access replay of a simulation session
+# A session is executed once on a Bulldozer. While it runs, the replay records:
+#   - after every command, the location, direction and cost quantities of the bulldozer,
+#     and the square blocks the command cleared, with their previous types, as a delta
+#   - every N commands, a keyframe holding the square block codes of the whole site map
+# The state after any command is then rebuilt from the closest keyframe, or from the
+# current state, by applying or reverting at most N deltas.
+
+from core.site_map import SiteMap, SquareType
+from core.bulldozer import Bulldozer, Location
+from core.expense import Expense
+from core.simulator_exceptions import INVALIDKEYFRAMEINTERVAL
+
+
+class RecordingBulldozer(Bulldozer):
+    """
+    A Bulldozer that logs the square blocks it clears
+    """
+
+    def __init__(self, siteMap):
+        """
+        Initializes the bulldozer with an empty log of cleared square blocks
+        :param siteMap(SiteMap): the site map on which the bulldozer will execute
+        """
+        super(RecordingBulldozer, self).__init__(siteMap)
+        self.clearedLog = []
+
+    def visit(self, row, column):
+        """
+        Logs the square block as (row-major index, previous SquareType value) if the visit clears it,
+        and visits it
+        :param row(int): the row if the visiting square block
+        :param column(int): the column if the visiting square block
+        """
+        squareType = self.siteMap.getSquare(row, column)
+        if squareType != SquareType.CLEAR and squareType != SquareType.NONREMOVABLE_TREE:
+            self.clearedLog.append((row * self.siteMap.columns + column, squareType.value))
+        super(RecordingBulldozer, self).visit(row, column)
+
+
+class ReplayState(object):
+    """
+    This class represents the state of a session after a number of commands
+    """
+
+    def __init__(self, step, codes, rows, columns, location, direction, costQuantity, history, terminationReason):
+        """
+        :param step(int): number of commands applied
+        :param codes(bytearray): row-major square block codes of the site map
+        :param rows(int): number of rows of the site map
+        :param columns(int): number of columns of the site map
+        :param location(Location): location of the bulldozer
+        :param direction(Direction): direction of the bulldozer
+        :param costQuantity(dict): quantity of each cost item
+        :param history(list): the command history
+        :param terminationReason(str): termination message after this step, None if the session goes on
+        """
+        self.step = step
+        self.codes = codes
+        self.rows = rows
+        self.columns = columns
+        self.location = location
+        self.direction = direction
+        self.costQuantity = costQuantity
+        self.history = history
+        self.terminationReason = terminationReason
+
+    def getSiteMap(self):
+        """
+        Returns the site map in this state
+        :rtype: SiteMap
+        """
+        return SiteMap.fromCodes(self.codes, self.rows, self.columns)
+
+    def getExpense(self):
+        """
+        Returns the expenses in this state
+        :rtype: Expense
+        """
+        expense = Expense(0)
+        expense.costQuantity = dict(self.costQuantity)
+        return expense
+
+
+class SessionReplay(object):
+    """
+    This class executes a session once and then provides the state after any of its commands
+    """
+
+    def __init__(self, siteMap, commands, keyframeInterval=50):
+        """
+        Executes the commands on a copy of the site map and records keyframes and deltas
+        Commands after a termination are not executed, like in the simulator
+        :param siteMap(SiteMap): the site map of the session, it is not modified
+        :param commands(list): valid simulator commands
+        :param keyframeInterval(int): number of commands between two keyframes, at least 1
+        """
+        if keyframeInterval < 1:
+            raise ValueError(INVALIDKEYFRAMEINTERVAL.format(keyframeInterval))
+        self.rows = siteMap.rows
+        self.columns = siteMap.columns
+        self.keyframeInterval = keyframeInterval
+        bulldozer = RecordingBulldozer(SiteMap.fromCodes(siteMap.toCodes(), self.rows, self.columns))
+
+        self.keyframes = [bytes(siteMap.toCodes())]
+        # deltas[k] holds the square blocks cleared by command k, deltas[0] is empty
+        self.deltas = [()]
+        self.locations = [(bulldozer.location.row, bulldozer.location.column)]
+        self.directions = [bulldozer.direction]
+        self.costQuantities = [dict(bulldozer.expense.costQuantity)]
+        self.terminationReason = None
+
+        for commandStr in commands:
+            try:
+                bulldozer.applyCommand(commandStr)
+            except Exception as e:
+                self.terminationReason = str(e)
+            self.deltas.append(tuple(bulldozer.clearedLog))
+            bulldozer.clearedLog = []
+            self.locations.append((bulldozer.location.row, bulldozer.location.column))
+            self.directions.append(bulldozer.direction)
+            self.costQuantities.append(dict(bulldozer.expense.costQuantity))
+            if (len(self.deltas) - 1) % keyframeInterval == 0:
+                self.keyframes.append(bytes(bulldozer.siteMap.toCodes()))
+            if self.terminationReason is not None:
+                break
+        self.history = bulldozer.history
+
+        # The state the replay is currently positioned at
+        self.step = 0
+        self.codes = bytearray(self.keyframes[0])
+
+    def getStepCount(self):
+        """
+        Returns the number of executed commands
+        :rtype: int
+        """
+        return len(self.deltas) - 1
+
+    def seek(self, step):
+        """
+        Moves the replay to the state after the given number of commands and returns it
+        Goes through the current state or through the closest keyframe before the step,
+        whichever needs fewer deltas
+        :param step(int): number of commands, between 0 and getStepCount()
+        :rtype: ReplayState
+        """
+        step = max(0, min(step, self.getStepCount()))
+        keyframe = step // self.keyframeInterval
+        if abs(step - self.step) > step - keyframe * self.keyframeInterval:
+            self.codes = bytearray(self.keyframes[keyframe])
+            self.step = keyframe * self.keyframeInterval
+
+        clearCode = SquareType.CLEAR.value
+        while self.step < step:
+            self.step += 1
+            for index, _ in self.deltas[self.step]:
+                self.codes[index] = clearCode
+        while self.step > step:
+            for index, code in self.deltas[self.step]:
+                self.codes[index] = code
+            self.step -= 1
+        return self.getState()
+
+    def getState(self):
+        """
+        Returns the state the replay is currently positioned at
+        :rtype: ReplayState
+        """
+        row, column = self.locations[self.step]
+        terminationReason = self.terminationReason if self.step == self.getStepCount() else None
+        return ReplayState(self.step, bytearray(self.codes), self.rows, self.columns, Location(row, column),
+                           self.directions[self.step], dict(self.costQuantities[self.step]),
+                           self.history[:self.step], terminationReason)
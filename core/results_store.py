@@ -0,0 +1,292 @@
+# Indexed store of the results of finished simulation sessions
+# Every session is kept as one row of a local SQLite database, with the fingerprint of its
+# site map, the trainee who drove the bulldozer, the termination, the number of commands,
+# the quantity of every cost item and the total cost. Sessions are inserted in batches,
+# each in a single transaction, and the columns used to filter and sort the sessions are
+# indexed, so that questions over a large archive are answered without replaying it.
+
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from core.expense import CostItem, costPerQuantity
+from core.map_cache import loadSiteMap
+from core.disk_cache import fileContentHash
+from core.session import readSessionFile, replaySession, countUnclearedSquares
+from core.simulator_exceptions import (
+    QUITSIMULATION,
+    OUTOFSITEMOVE,
+    MOVEONPROTECTEDTREE
+)
+
+
+# dictionary mapping the termination messages to the names stored in the database
+# None means the session ran out of commands before any termination
+terminationNames = {
+    QUITSIMULATION: "quit",
+    OUTOFSITEMOVE: "out_of_site",
+    MOVEONPROTECTEDTREE: "protected_tree",
+    None: "unfinished"
+}
+
+# dictionary mapping the cost items to their columns
+costColumns = {
+    CostItem.COMMUNICATION: "communication",
+    CostItem.FUEL: "fuel",
+    CostItem.UNCLEARD_SQUARE: "uncleared_squares",
+    CostItem.PROTECTED_TREE_DESTRUCTION: "protected_tree_destruction",
+    CostItem.PAINT_DAMAGE: "paint_damage"
+}
+
+# columns of a session row, in insertion order
+sessionColumns = ["map_fingerprint", "trainee", "source", "termination", "command_count"] + \
+    [costColumns[item] for item in CostItem] + ["total_cost"]
+
+schema = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    map_fingerprint TEXT NOT NULL,
+    trainee TEXT,
+    source TEXT,
+    termination TEXT NOT NULL,
+    command_count INTEGER NOT NULL,
+    communication INTEGER NOT NULL,
+    fuel INTEGER NOT NULL,
+    uncleared_squares INTEGER NOT NULL,
+    protected_tree_destruction INTEGER NOT NULL,
+    paint_damage INTEGER NOT NULL,
+    total_cost INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS sessions_source ON sessions (map_fingerprint, source);
+CREATE INDEX IF NOT EXISTS sessions_map_cost ON sessions (map_fingerprint, total_cost);
+CREATE INDEX IF NOT EXISTS sessions_termination ON sessions (termination, command_count);
+CREATE INDEX IF NOT EXISTS sessions_map_termination ON sessions (map_fingerprint, termination, command_count);
+CREATE INDEX IF NOT EXISTS sessions_trainee ON sessions (trainee, map_fingerprint);
+"""
+
+# archives smaller than this number of sessions are replayed in the calling process
+parallelThreshold = 512
+
+
+def getTotalCost(costQuantity):
+    """
+    Calculates the total cost of the given cost quantities
+    :param costQuantity(dict): quantity of each CostItem
+    :rtype: int
+    """
+    return sum(costQuantity[item] * costPerQuantity[item] for item in CostItem)
+
+
+def sessionRow(fingerprint, trainee, source, result):
+    """
+    Converts the result of a replayed session to a row of the sessions table
+    :param fingerprint(str): the fingerprint of the site map
+    :param trainee(str): the trainee ID
+    :param source(str): the session file, or any other name identifying the session on its site map
+    :param result(SessionResult): the result of the session
+    :rtype: tuple
+    """
+    return (fingerprint, trainee, source, terminationNames[result.terminationReason], result.getCommandCount()) + \
+        tuple(result.costQuantity[item] for item in CostItem) + (getTotalCost(result.costQuantity),)
+
+
+def traineeFromPath(sessionFile):
+    """
+    Returns the trainee ID of a session file of an archive laid out as <trainee>/<session>.txt
+    :param sessionFile(str): the path to the session file
+    :rtype: str
+    """
+    return os.path.basename(os.path.dirname(os.path.abspath(sessionFile)))
+
+
+def sessionSource(sessionFile):
+    """
+    Returns the source stored for a session file, its absolute path, so that a session added
+    again by another path replaces its row
+    :param sessionFile(str): the path to the session file
+    :rtype: str
+    """
+    return os.path.abspath(sessionFile)
+
+
+class ResultsStore(object):
+    """
+    This class represents the database of session results
+    Rows are added to a pending batch, which is written in a single transaction
+    when it reaches batchSize rows or when flush is called
+    """
+
+    def __init__(self, databasePath, batchSize=10000):
+        """
+        Opens the database, creating its table and indexes if needed
+        :param databasePath(str): the path to the SQLite database file
+        :param batchSize(int): number of rows written in one transaction
+        """
+        self.connection = sqlite3.connect(databasePath)
+        self.connection.row_factory = sqlite3.Row
+        # The write-ahead log lets queries run while sessions are being ingested
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(schema)
+        self.batchSize = batchSize
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+    def addRow(self, row):
+        """
+        Adds a row, as returned by sessionRow, to the pending batch
+        A session already stored for the same site map and source is replaced
+        :param row(tuple): the session row
+        """
+        self.pending.append(row)
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+
+    def addSession(self, fingerprint, trainee, source, result):
+        """
+        Adds the result of a replayed session to the pending batch
+        :param fingerprint(str): the fingerprint of the site map
+        :param trainee(str): the trainee ID
+        :param source(str): the name identifying the session on its site map
+        :param result(SessionResult): the result of the session
+        """
+        self.addRow(sessionRow(fingerprint, trainee, source, result))
+
+    def flush(self):
+        """
+        Writes the pending batch in a single transaction
+        """
+        if not self.pending:
+            return
+        statement = "INSERT OR REPLACE INTO sessions ({}) VALUES ({})".format(
+            ", ".join(sessionColumns), ", ".join("?" * len(sessionColumns)))
+        with self.connection:
+            self.connection.executemany(statement, self.pending)
+        self.pending = []
+
+    def close(self):
+        """
+        Writes the pending batch and closes the database
+        """
+        self.flush()
+        self.connection.close()
+
+    def getSessionCount(self, fingerprint=None):
+        """
+        Returns the number of stored sessions, on one site map if a fingerprint is given
+        :param fingerprint(str): the fingerprint of the site map
+        :rtype: int
+        """
+        if fingerprint is None:
+            return self.connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return self.connection.execute("SELECT COUNT(*) FROM sessions WHERE map_fingerprint = ?",
+                                       (fingerprint,)).fetchone()[0]
+
+    def findSessions(self, fingerprint=None, trainee=None, termination=None, maxCommands=None,
+                     orderBy="total_cost", limit=100):
+        """
+        Returns the stored sessions matching all the given filters, as sqlite3.Row objects
+        :param fingerprint(str): the fingerprint of the site map
+        :param trainee(str): the trainee ID
+        :param termination(str): one of the values of terminationNames
+        :param maxCommands(int): the largest number of commands
+        :param orderBy(str): column the sessions are sorted by, in ascending order
+        :param limit(int): the largest number of sessions returned, all of them if None
+        :rtype: list
+        """
+        if orderBy not in sessionColumns:
+            raise Exception("{} is not a column of the results store".format(orderBy))
+        conditions = []
+        parameters = []
+        for column, value in [("map_fingerprint", fingerprint), ("trainee", trainee), ("termination", termination)]:
+            if value is not None:
+                conditions.append("{} = ?".format(column))
+                parameters.append(value)
+        if maxCommands is not None:
+            conditions.append("command_count <= ?")
+            parameters.append(maxCommands)
+        query = "SELECT * FROM sessions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY {}, id".format(orderBy)
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self.connection.execute(query, parameters).fetchall()
+
+    def getLowestCostSessions(self, fingerprint, limit=100):
+        """
+        Returns the sessions with the lowest total cost on a site map
+        :param fingerprint(str): the fingerprint of the site map
+        :param limit(int): the number of sessions
+        :rtype: list
+        """
+        return self.findSessions(fingerprint=fingerprint, limit=limit)
+
+    def getProtectedTreeHits(self, maxCommands, fingerprint=None, limit=None):
+        """
+        Returns the sessions that hit a protected tree within the given number of commands
+        The session ends on a protected tree, so the command that hit it is the last one
+        :param maxCommands(int): the largest number of commands
+        :param fingerprint(str): the fingerprint of the site map, all site maps if None
+        :param limit(int): the largest number of sessions returned, all of them if None
+        :rtype: list
+        """
+        return self.findSessions(fingerprint=fingerprint, termination=terminationNames[MOVEONPROTECTEDTREE],
+                                 maxCommands=maxCommands, orderBy="command_count", limit=limit)
+
+
+_workerSite = None
+
+
+def _initWorker(siteMapFile, fingerprint, cacheDirectory):
+    global _workerSite
+    siteMap = loadSiteMap(siteMapFile, cacheDirectory)
+    codes = bytes(siteMap.toCodes())
+    _workerSite = (codes, siteMap.rows, siteMap.columns, countUnclearedSquares(codes), fingerprint)
+
+
+def _replayBatch(sessions):
+    codes, rows, columns, totalUncleared, fingerprint = _workerSite
+    return [sessionRow(fingerprint, trainee, sessionFile,
+                       replaySession(codes, rows, columns, readSessionFile(sessionFile), totalUncleared))
+            for sessionFile, trainee in sessions]
+
+
+def ingestSessions(store, siteMapFile, sessionFiles, trainee=None, workers=None, batchSize=256, cacheDirectory=None):
+    """
+    Replays session files of a site map and stores their results
+    Sessions are stored under the absolute paths of their files, so that a file ingested again
+    replaces its session whichever path it is given by
+    Large archives are split into batches and replayed by a pool of processes
+    Returns the number of stored sessions
+    :param store(ResultsStore): the results store
+    :param siteMapFile(str): the path to the site map file
+    :param sessionFiles(list): paths to the session files
+    :param trainee(str): the trainee ID of all the sessions, taken from the directory of each file if None
+    :param workers(int): number of processes, defaults to the number of CPUs
+    :param batchSize(int): number of sessions per batch of a process
+    :param cacheDirectory(str): directory of the cached site maps, defaults to the "maps" cache
+    :rtype: int
+    """
+    fingerprint = fileContentHash(siteMapFile)
+    sessions = [(sessionSource(sessionFile), trainee if trainee is not None else traineeFromPath(sessionFile))
+                for sessionFile in sessionFiles]
+    if len(sessions) < parallelThreshold or workers == 1:
+        _initWorker(siteMapFile, fingerprint, cacheDirectory)
+        for row in _replayBatch(sessions):
+            store.addRow(row)
+    else:
+        batches = [sessions[start:start + batchSize] for start in range(0, len(sessions), batchSize)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                                 initargs=(siteMapFile, fingerprint, cacheDirectory)) as pool:
+            for rows in pool.map(_replayBatch, batches):
+                for row in rows:
+                    store.addRow(row)
+    store.flush()
+    return len(sessions)
@@ -0,0 +1,251 @@
+# Lightweight replay of recorded simulation sessions
+# A session is a text file with one command per line, written either the way
+# it is typed into the simulator ("a 4", "r", "q") or the way it appears in the
+# command history of the final report ("Advance 4", "Turn right", "Quit").
+#
+# The replay works directly on the row-major square block codes of a site map
+# (see SiteMap.toCodes) and keeps the cleared squares of a session in a set,
+# so many sessions can be replayed over one shared map without building a
+# Bulldozer object, and without copying the site map, for each of them.
+
+import os
+from os import path
+
+from core.site_map import SquareType, squareTypesByCode
+from core.expense import CostItem, fuelConsumption
+from core.bulldozer import Direction, Location
+from core.simulator_exceptions import (
+    FILENOTEXIST,
+    READACCESSNOTPROVIDED,
+    QUITSIMULATION,
+    OUTOFSITEMOVE,
+    MOVEONPROTECTEDTREE
+)
+
+
+# dictionary mapping each direction to the (row, column) step of one square block
+directionSteps = {
+    Direction.EAST: (0, 1),
+    Direction.SOUTH: (1, 0),
+    Direction.WEST: (0, -1),
+    Direction.NORTH: (-1, 0)
+}
+
+# dictionary mapping the command history entries to the commands typed in the simulator
+historyCommandMap = {
+    'turn left': 'l',
+    'turn right': 'r',
+    'quit': 'q'
+}
+
+# fuel consumed by each square block code, indexed by SquareType value
+fuelByCode = tuple(fuelConsumption[sqType] for sqType in squareTypesByCode)
+
+
+def isValidCommand(commandStr):
+    """
+    Checks if the given command is valid
+    Returns True if the command is valid, False if invalid
+    :param commandStr(str): the command, stripped and in lowercase
+    :rtype: bool
+    """
+    validCommands = ['left', 'l', 'right', 'r', 'quit', 'q']
+    validMultipartCommands = ['advance', 'a']
+    if commandStr in validCommands:
+        return True
+    for command in validMultipartCommands:
+        # Only advance command is a two-part command
+        if commandStr.startswith(command) and len(commandStr.split()) == 2:
+            try:
+                squares = int(commandStr.split()[1])
+                # Number of advancement steps cannot be less than 1
+                if squares <= 0:
+                    return False
+                return True
+            except ValueError:
+                return False
+    return False
+
+
+def normalizeCommand(line):
+    """
+    Converts a line of a session file to a simulator command
+    Accepts both the typed commands and the command history entries
+    :param line(str): a line of a session file
+    :rtype: str
+    """
+    commandStr = line.strip().lower()
+    return historyCommandMap.get(commandStr, commandStr)
+
+
+def readSessionFile(filePath):
+    """
+    Reads the commands of a session from file
+    Blank lines and invalid commands are skipped, as the simulator does not accept them either
+    Returns the list of commands
+    :param filePath(str): the path to the session file
+    :rtype: list
+    """
+    if not path.exists(filePath):
+        raise Exception(FILENOTEXIST.format(filePath))
+
+    try:
+        with open(filePath, "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        raise Exception(READACCESSNOTPROVIDED.format(filePath))
+
+    commands = []
+    for line in lines:
+        commandStr = normalizeCommand(line)
+        if isValidCommand(commandStr):
+            commands.append(commandStr)
+    return commands
+
+
+def listSessionFiles(paths):
+    """
+    Expands the given paths to a sorted list of session files
+    Directories are searched recursively for .txt files
+    :param paths(list): session files and directories
+    :rtype: list
+    """
+    sessionFiles = []
+    for sessionPath in paths:
+        if os.path.isdir(sessionPath):
+            for root, _, files in os.walk(sessionPath):
+                sessionFiles.extend(os.path.join(root, name) for name in files if name.endswith(".txt"))
+        else:
+            sessionFiles.append(sessionPath)
+    return sorted(sessionFiles)
+
+
+def countUnclearedSquares(codes):
+    """
+    Calculates total number of non-cleared square blocks in the given codes
+    Like SiteMap.getClearableSquares, it does not include the protected trees
+    :param codes(bytes): row-major square block codes of a site map
+    :rtype: int
+    """
+    return codes.count(SquareType.PLAIN.value) + \
+        codes.count(SquareType.ROCK.value) + \
+        codes.count(SquareType.REMOVABLE_TREE.value)
+
+
+class SessionResult(object):
+    """
+    This class holds the outcome of a replayed session
+    Besides the final state and expenses, it keeps the square blocks the bulldozer
+    visited, stopped on and passed through trees on, as row-major indices
+    """
+
+    def __init__(self, totalUncleared):
+        """
+        Initializes an empty result, located at the starting point of the bulldozer
+        :param totalUncleared(int): initial number of clearable square blocks that are not cleared
+        """
+        self.location = Location(0, -1)
+        self.direction = Direction.EAST
+        self.history = []
+        self.costQuantity = {
+            CostItem.COMMUNICATION: 0,
+            CostItem.FUEL: 0,
+            CostItem.UNCLEARD_SQUARE: totalUncleared,
+            CostItem.PROTECTED_TREE_DESTRUCTION: 0,
+            CostItem.PAINT_DAMAGE: 0
+        }
+        # The message of the termination, None if the session ran out of commands
+        self.terminationReason = None
+        # The index of the square block where the bulldozer terminated, None if it is off the site
+        self.terminationCell = None
+        self.cleared = set()
+        self.visits = []
+        self.stops = []
+        self.treeHits = []
+
+    def getCommandCount(self):
+        """
+        Returns the number of commands the bulldozer has executed
+        :rtype: int
+        """
+        return len(self.history)
+
+
+def replaySession(codes, rows, columns, commands, totalUncleared=None):
+    """
+    Replays the commands of a session on the given site map codes
+    Follows the same rules as Bulldozer.applyCommand, but does not modify the codes
+    Returns the SessionResult of the replay
+    :param codes(bytes): row-major square block codes of the site map
+    :param rows(int): number of rows of the site map
+    :param columns(int): number of columns of the site map
+    :param commands(list): valid simulator commands
+    :param totalUncleared(int): number of clearable square blocks, counted from codes if not given
+    :rtype: SessionResult
+    """
+    if totalUncleared is None:
+        totalUncleared = countUnclearedSquares(codes)
+    result = SessionResult(totalUncleared)
+    costQuantity = result.costQuantity
+    cleared = result.cleared
+    row = result.location.row
+    column = result.location.column
+    direction = result.direction
+
+    clearCode = SquareType.CLEAR.value
+    removableTreeCode = SquareType.REMOVABLE_TREE.value
+    protectedTreeCode = SquareType.NONREMOVABLE_TREE.value
+
+    for commandStr in commands:
+        if commandStr[0] == 'a':
+            squaresStr = commandStr.split()[1]
+            result.history.append("Advance {}".format(squaresStr))
+            costQuantity[CostItem.COMMUNICATION] += 1
+            squares = int(squaresStr)
+            dRow, dColumn = directionSteps[direction]
+            for i in range(1, squares + 1):
+                if row + dRow < 0 or column + dColumn < 0 or row + dRow >= rows or column + dColumn >= columns:
+                    result.terminationReason = OUTOFSITEMOVE
+                    if row >= 0 and column >= 0:
+                        result.terminationCell = row * columns + column
+                    break
+                row += dRow
+                column += dColumn
+                index = row * columns + column
+                code = clearCode if index in cleared else codes[index]
+                result.visits.append(index)
+                # Passing through a removable tree without stopping on it causes paint damage
+                if i < squares and code == removableTreeCode:
+                    costQuantity[CostItem.PAINT_DAMAGE] += 1
+                    result.treeHits.append(index)
+                if code == protectedTreeCode:
+                    costQuantity[CostItem.PROTECTED_TREE_DESTRUCTION] += 1
+                    result.terminationReason = MOVEONPROTECTEDTREE
+                    result.terminationCell = index
+                    break
+                if code != clearCode:
+                    costQuantity[CostItem.UNCLEARD_SQUARE] -= 1
+                    cleared.add(index)
+                costQuantity[CostItem.FUEL] += fuelByCode[code]
+            if result.terminationReason is not None:
+                break
+            result.stops.append(row * columns + column)
+        elif commandStr == 'right' or commandStr == 'r':
+            result.history.append("Turn right")
+            costQuantity[CostItem.COMMUNICATION] += 1
+            direction = Direction((direction.value + 1) % 4)
+        elif commandStr == 'left' or commandStr == 'l':
+            result.history.append("Turn left")
+            costQuantity[CostItem.COMMUNICATION] += 1
+            direction = Direction((direction.value - 1) % 4)
+        elif commandStr == 'quit' or commandStr == 'q':
+            # The quit command has no communication overhead
+            result.history.append("Quit")
+            result.terminationReason = QUITSIMULATION
+            if row >= 0 and column >= 0:
+                result.terminationCell = row * columns + column
+            break
+
+    result.location = Location(row, column)
+    result.direction = direction
+    return result
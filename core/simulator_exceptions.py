@@ -5,6 +5,11 @@ READACCESSNOTPROVIDED = "Read access to {} is not provided"
 UNACCEPTABLESQUARE = "Site map contains unacceptable characters: {}"
 EMPTYFILE = "SiteMap file is emapty"
 NOTAGRID = "Site map is not a grid with equal number of columns in each row"
+UNACCEPTABLESQUAREAT = "Line {}, column {}: unacceptable character {}"
+NOTAGRIDAT = "Line {}: {} columns instead of {}, the number of columns of line 1"
+SITEMAPERRORS = "Site map file has {} errors:\n{}"
+INVALIDKEYFRAMEINTERVAL = "The keyframe interval must be at least 1, not {}"
+INVALIDZONE = "Line {} of the zone file is not a zone <name> <top row> <left column> <bottom row> <right column>: {}"
 
 QUITSIMULATION = "The simulation has ended at your request.\n"
 OUTOFSITEMOVE = "Bulldozer moved out of site!"
@@ -51,6 +51,9 @@ squareCharacterMap = {
     SquareType.CLEAR: '*'
 }
 
+# A tuple mapping the square block codes (the values of SquareTypes) to square block types
+squareTypesByCode = tuple(sorted(SquareType, key=lambda sqType: sqType.value))
+
 
 class SiteMap(object):
     """
@@ -59,6 +62,10 @@ class SiteMap(object):
     It consists of a 2-D array of SquareTypes as the site map and the number of rows and columns on it
     """
 
+    # RegionStats kept up to date with the changes of the site map, set by attachRegionStats,
+    # None if no counts are needed
+    regionStats = None
+
     def __init__(self, filePath):
         """
         Reads the sitemap from file and sets rows and column accordingly
@@ -68,6 +75,34 @@ class SiteMap(object):
         self.rows = len(self.siteMap)
         self.columns = len(self.siteMap[0])
 
+    @classmethod
+    def fromCodes(cls, codes, rows, columns):
+        """
+        Creates a sitemap from row-major square block codes, as returned by toCodes
+        The codes are expected to be valid, they are not checked again
+        :param codes(bytes): the square block codes
+        :param rows(int): number of rows of the sitemap
+        :param columns(int): number of columns of the sitemap
+        :rtype: SiteMap
+        """
+        siteMap = cls.__new__(cls)
+        getSquareType = squareTypesByCode.__getitem__
+        siteMap.siteMap = [list(map(getSquareType, codes[i * columns:(i + 1) * columns])) for i in range(rows)]
+        siteMap.rows = rows
+        siteMap.columns = columns
+        return siteMap
+
+    def copy(self):
+        """
+        Returns an independent copy of the sitemap, without the attached RegionStats
+        :rtype: SiteMap
+        """
+        siteMap = type(self).__new__(type(self))
+        siteMap.siteMap = [list(row) for row in self.siteMap]
+        siteMap.rows = self.rows
+        siteMap.columns = self.columns
+        return siteMap
+
     def readFromFile(self, filePath):
         """
         Reads the sitemap from file
@@ -137,12 +172,10 @@ class SiteMap(object):
         :rtype: int
         """
         count = 0
-        for i in range(self.rows):
-            for j in range(self.columns):
-                if self.siteMap[i][j] == SquareType.PLAIN or \
-                   self.siteMap[i][j] == SquareType.ROCK or \
-                   self.siteMap[i][j] == SquareType.REMOVABLE_TREE:
-                    count += 1
+        for row in self.siteMap:
+            count += row.count(SquareType.PLAIN) + \
+                row.count(SquareType.ROCK) + \
+                row.count(SquareType.REMOVABLE_TREE)
         return count
 
     def isValid(self, row, column):
@@ -155,3 +188,52 @@ class SiteMap(object):
         if row < 0 or column < 0 or row >= self.rows or column >= self.columns:
             return False
         return True
+
+    def getSquare(self, row, column):
+        """
+        Returns the type of the square block in the given row and column
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :rtype: SquareType
+        """
+        return self.siteMap[row][column]
+
+    def clearSquare(self, row, column):
+        """
+        Marks the square block in the given row and column as cleared
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        """
+        if self.regionStats is not None:
+            self.regionStats.changeSquare(row, column, self.siteMap[row][column], SquareType.CLEAR)
+        self.siteMap[row][column] = SquareType.CLEAR
+
+    def setSquare(self, row, column, sqType):
+        """
+        Sets the type of the square block in the given row and column, to undo changes of the site map
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :param sqType(SquareType): the type of the square block
+        """
+        if self.regionStats is not None:
+            self.regionStats.changeSquare(row, column, self.siteMap[row][column], sqType)
+        self.siteMap[row][column] = sqType
+
+    def attachRegionStats(self, regionStats):
+        """
+        Keeps the given counts up to date with the changes of the site map, from now on
+        :param regionStats(RegionStats): counts built from this site map, None to stop updating them
+        """
+        self.regionStats = regionStats
+
+    def toCodes(self):
+        """
+        Returns the site map as a compact row-major array of square block codes
+        Each byte holds the value of the SquareType at that position,
+        the square block at (row, column) is at index row * columns + column
+        :rtype: bytearray
+        """
+        codes = bytearray(self.rows * self.columns)
+        for i in range(self.rows):
+            codes[i * self.columns:(i + 1) * self.columns] = bytes(sqType.value for sqType in self.siteMap[i])
+        return codes
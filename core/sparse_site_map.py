@@ -0,0 +1,247 @@
+# Sparse representation of the site map, for very large sites that are mostly plain land
+# Only the square blocks that are not plain land are stored: rocks and trees in a dictionary
+# of rows, each holding a dictionary of columns, and cleared square blocks in a set of
+# row-major indexes. Plain land is the implicit default, so the memory used grows with the
+# number of obstacles and cleared square blocks, not with the area of the site.
+
+import re
+from os import path
+
+from core.site_map import SiteMap, SquareType, squareTypeMap, squareCharacterMap
+from core.simulator_exceptions import (
+    FILENOTEXIST,
+    READACCESSNOTPROVIDED,
+    UNACCEPTABLESQUARE,
+    EMPTYFILE,
+    NOTAGRID
+)
+
+# matches every character that is not plain land
+nonPlainPattern = re.compile(r"[^o]")
+
+
+class SparseSiteMap(SiteMap):
+    """
+    This class represents the site map to be cleared by bulldozer, storing only the square blocks
+    that are not plain land
+    It can be used in place of a SiteMap by the bulldozer and by all the analyses working on toCodes
+    """
+
+    def __init__(self, filePath):
+        """
+        Reads the sitemap from file and sets rows and column accordingly
+        The file is checked the same way as by SiteMap
+        :param filePath(str): the path to the file
+        """
+        # dictionary mapping rows to dictionaries mapping columns to rocks and trees
+        self.obstacles = {}
+        # row-major indexes of the cleared square blocks
+        self.cleared = set()
+        self.protectedTrees = 0
+        self.readFromFile(filePath)
+
+    @classmethod
+    def fromCodes(cls, codes, rows, columns):
+        """
+        Creates a sparse sitemap from row-major square block codes, as returned by toCodes
+        :param codes(bytes): the square block codes
+        :param rows(int): number of rows of the sitemap
+        :param columns(int): number of columns of the sitemap
+        :rtype: SparseSiteMap
+        """
+        siteMap = cls.__new__(cls)
+        siteMap.obstacles = {}
+        siteMap.cleared = set()
+        siteMap.protectedTrees = 0
+        siteMap.rows = rows
+        siteMap.columns = columns
+        for index, code in enumerate(codes):
+            if code != SquareType.PLAIN.value:
+                siteMap._setSquare(index // columns, index % columns, SquareType(code))
+        return siteMap
+
+    def copy(self):
+        """
+        Returns an independent copy of the sparse sitemap, without the attached RegionStats
+        Only the rocks, trees and cleared square blocks are copied
+        :rtype: SparseSiteMap
+        """
+        siteMap = type(self).__new__(type(self))
+        siteMap.obstacles = dict((row, dict(columns)) for row, columns in self.obstacles.items())
+        siteMap.cleared = set(self.cleared)
+        siteMap.protectedTrees = self.protectedTrees
+        siteMap.rows = self.rows
+        siteMap.columns = self.columns
+        return siteMap
+
+    def readFromFile(self, filePath):
+        """
+        Reads the sitemap from file, storing every square block that is not plain land
+        :param filePath(str): the path to the input sitemap file
+        """
+
+        # Check if the file exists
+        if not path.exists(filePath):
+            raise Exception(FILENOTEXIST.format(filePath))
+
+        # Check if read access is provided to the file
+        try:
+            f = open(filePath, "r")
+        except OSError:
+            raise Exception(READACCESSNOTPROVIDED.format(filePath))
+
+        # The file is read one line at a time, so that only the stored square blocks are kept.
+        # As with SiteMap, a file that is not a grid is reported before an unacceptable character
+        self.rows = 0
+        self.columns = None
+        unacceptable = None
+        with f:
+            try:
+                for line in f:
+                    line = line.rstrip("\r\n")
+                    # Check if the content of the file represents a grid
+                    if self.columns is None:
+                        self.columns = len(line)
+                    elif len(line) != self.columns:
+                        raise Exception(NOTAGRID)
+                    if unacceptable is None:
+                        for match in nonPlainPattern.finditer(line):
+                            c = match.group()
+                            if c not in squareTypeMap:
+                                unacceptable = c
+                                break
+                            self._setSquare(self.rows, match.start(), squareTypeMap[c])
+                    self.rows += 1
+            except OSError:
+                raise Exception(READACCESSNOTPROVIDED.format(filePath))
+
+        # Check if the file is empty
+        if self.rows == 0:
+            raise Exception(EMPTYFILE)
+        if unacceptable is not None:
+            raise Exception(UNACCEPTABLESQUARE.format(unacceptable))
+
+    def _setSquare(self, row, column, sqType):
+        """
+        Stores a square block that is not plain land
+        """
+        if sqType == SquareType.CLEAR:
+            self.cleared.add(row * self.columns + column)
+            return
+        if sqType == SquareType.NONREMOVABLE_TREE:
+            self.protectedTrees += 1
+        rowObstacles = self.obstacles.get(row)
+        if rowObstacles is None:
+            rowObstacles = self.obstacles[row] = {}
+        rowObstacles[column] = sqType
+
+    def _removeObstacle(self, row, column):
+        """
+        Removes the rock or tree stored at the given row and column, if any
+        """
+        rowObstacles = self.obstacles.get(row)
+        if rowObstacles is not None and column in rowObstacles:
+            if rowObstacles.pop(column) == SquareType.NONREMOVABLE_TREE:
+                self.protectedTrees -= 1
+            if not rowObstacles:
+                del self.obstacles[row]
+
+    def getSquare(self, row, column):
+        """
+        Returns the type of the square block in the given row and column
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :rtype: SquareType
+        """
+        if row * self.columns + column in self.cleared:
+            return SquareType.CLEAR
+        rowObstacles = self.obstacles.get(row)
+        if rowObstacles is None:
+            return SquareType.PLAIN
+        return rowObstacles.get(column, SquareType.PLAIN)
+
+    def clearSquare(self, row, column):
+        """
+        Marks the square block in the given row and column as cleared
+        A cleared rock or tree is no longer stored as an obstacle
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        """
+        if self.regionStats is not None:
+            self.regionStats.changeSquare(row, column, self.getSquare(row, column), SquareType.CLEAR)
+        self._removeObstacle(row, column)
+        self.cleared.add(row * self.columns + column)
+
+    def setSquare(self, row, column, sqType):
+        """
+        Sets the type of the square block in the given row and column, to undo changes of the site map
+        :param row(int): row of the sitemap
+        :param column(int): column of the sitemap
+        :param sqType(SquareType): the type of the square block
+        """
+        if self.regionStats is not None:
+            self.regionStats.changeSquare(row, column, self.getSquare(row, column), sqType)
+        self.cleared.discard(row * self.columns + column)
+        self._removeObstacle(row, column)
+        if sqType != SquareType.PLAIN:
+            self._setSquare(row, column, sqType)
+
+    def getObstacleCount(self):
+        """
+        Returns the number of rocks and trees on the site
+        :rtype: int
+        """
+        return sum(len(rowObstacles) for rowObstacles in self.obstacles.values())
+
+    def getClearableSquares(self):
+        """
+        Calculates total number of non-cleared square blocks
+        Note: It does not include the number of protected trees, as they are considered non-clearable
+        :rtype: int
+        """
+        return self.rows * self.columns - len(self.cleared) - self.protectedTrees
+
+    def getRow(self, row):
+        """
+        Returns the square blocks of a row as a list of SquareTypes
+        :param row(int): row of the sitemap
+        :rtype: list
+        """
+        squares = [SquareType.PLAIN] * self.columns
+        for column, sqType in self.obstacles.get(row, {}).items():
+            squares[column] = sqType
+        start = row * self.columns
+        if self.cleared:
+            for column in range(self.columns):
+                if start + column in self.cleared:
+                    squares[column] = SquareType.CLEAR
+        return squares
+
+    def show(self):
+        """
+        Prints out the sitemap on the console
+        """
+        print("  -----------------------------------------------------------------  ")
+
+        printableSiteMap = ""
+        for row in range(self.rows):
+            printableSiteMap += '\t'.join([squareCharacterMap[sqType] for sqType in self.getRow(row)])
+            printableSiteMap += '\n'
+
+        print(printableSiteMap)
+        print("  -----------------------------------------------------------------  ")
+
+    def toCodes(self):
+        """
+        Returns the site map as a compact row-major array of square block codes
+        Plain land has code 0, so only the stored square blocks are written
+        :rtype: bytearray
+        """
+        codes = bytearray(self.rows * self.columns)
+        for row, rowObstacles in self.obstacles.items():
+            start = row * self.columns
+            for column, sqType in rowObstacles.items():
+                codes[start + column] = sqType.value
+        for index in self.cleared:
+            codes[index] = SquareType.CLEAR.value
+        return codes
@@ -0,0 +1,51 @@
+# Driver program for exporting site maps as images
+# Writes a site map, optionally after the commands of a session and with the path
+# of the bulldozer, as a PNG or PPM image, or one image per command of the session
+
+#!/usr/bin/python
+
+import argparse
+
+from core.map_cache import loadSiteMap, loadSiteCodes
+from core.session import readSessionFile
+from core.replay import SessionReplay
+from core.raster import exportCodes, exportSessionFrames
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Export a site map as a PNG or PPM image")
+  parser.add_argument("sitemap", help="path to the site map file")
+  parser.add_argument("output", help="output image (.png or .ppm), or output directory with --frames")
+  parser.add_argument("--session", default=None, help="session file whose commands are applied and drawn")
+  parser.add_argument("--frames", action="store_true", help="write one image per command of the session")
+  parser.add_argument("--format", choices=["png", "ppm"], default="png", help="image format of the frames")
+  parser.add_argument("--downscale", type=int, default=1, help="square blocks per pixel, for large sites")
+  parser.add_argument("--scale", type=int, default=1, help="pixels per square block, for small sites")
+  return parser.parse_args()
+
+if __name__ == "__main__":
+  args = parseArguments()
+  try:
+    # Only the frames need a site map, a single image is drawn from the square block codes
+    if args.frames:
+      siteMap = loadSiteMap(args.sitemap)
+    else:
+      codes, rows, columns = loadSiteCodes(args.sitemap)
+    commands = readSessionFile(args.session) if args.session else None
+  except Exception as e:
+    print(str(e))
+    exit(1)
+
+  if args.frames:
+    if commands is None:
+      print("Exporting frames requires a session file")
+      exit(1)
+    # Frames are written in order, so a single keyframe is enough
+    replay = SessionReplay(siteMap, commands, keyframeInterval=len(commands) + 1)
+    filePaths = exportSessionFrames(replay, args.output, args.format, args.downscale, args.scale)
+    print("Wrote {} frames to {}".format(len(filePaths), args.output))
+  else:
+    exportCodes(codes, rows, columns, args.output, commands, args.downscale, args.scale)
+    print("Wrote {}".format(args.output))
@@ -0,0 +1,45 @@
+# Driver program for differential fuzzing of the simulation engines
+# Runs random site maps and command scripts through the Bulldozer and through the
+# alternative engines, and prints minimal reproductions of any difference
+
+#!/usr/bin/python
+
+import argparse
+
+from core.fuzz import runFuzz, alternativeEngines
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Compare the simulation engines on random cases")
+  parser.add_argument("--iterations", type=int, default=10000, help="number of random cases")
+  parser.add_argument("--seed", type=int, default=0, help="seed of the random cases")
+  parser.add_argument("--engine", choices=sorted(alternativeEngines), action="append", default=None,
+                      help="alternative engine to compare, all of them by default")
+  parser.add_argument("--max-rows", type=int, default=8, help="largest number of rows of a site map")
+  parser.add_argument("--max-columns", type=int, default=8, help="largest number of columns of a site map")
+  parser.add_argument("--max-commands", type=int, default=20, help="longest command script")
+  parser.add_argument("--no-shrink", action="store_true", help="report failing cases without shrinking them")
+  return parser.parse_args()
+
+if __name__ == "__main__":
+  args = parseArguments()
+  names = args.engine if args.engine else sorted(alternativeEngines)
+  engines = dict((name, alternativeEngines[name]) for name in names)
+  report = runFuzz(args.iterations, args.seed, engines, not args.no_shrink,
+                   maxRows=args.max_rows, maxColumns=args.max_columns, maxCommands=args.max_commands)
+
+  print("\nExecuted {} cases with seed {}\n".format(report.cases, args.seed))
+  for name, executions in sorted(report.getExecutionsPerSecond().items()):
+    print('{0:<30} {1:>20.0f} executions per second'.format(name, executions))
+
+  for name, case, differences in report.failures:
+    print("\nThe {} engine differs from the reference engine on:\n".format(name))
+    print(case.describe())
+    for difference in differences:
+      print("  - " + difference)
+
+  if report.failures:
+    exit(1)
+  print("\nAll engines match the reference engine.\n")
@@ -0,0 +1,57 @@
+# Driver program for batch grading of command scripts
+# Evaluates all the session files of a site map at once, executing the prefixes
+# they share only once, and prints the total cost of each of them
+
+#!/usr/bin/python
+
+import argparse
+import time
+
+from core.map_cache import loadSiteMap
+from core.disk_cache import fileContentHash
+from core.session import readSessionFile, listSessionFiles
+from core.prefix_evaluator import CommandTrie, PrefixEvaluator
+from core.results_store import (ResultsStore, sessionRow, getTotalCost, terminationNames, traineeFromPath,
+                                sessionSource)
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Grade command scripts on a site map, sharing common prefixes")
+  parser.add_argument("sitemap", help="path to the site map file")
+  parser.add_argument("sessions", nargs="+", help="session files or directories of session files")
+  parser.add_argument("--database", default=None, help="results database to store the grades in")
+  parser.add_argument("--quiet", action="store_true", help="only print the summary")
+  return parser.parse_args()
+
+if __name__ == "__main__":
+  args = parseArguments()
+  try:
+    siteMap = loadSiteMap(args.sitemap)
+    sessionFiles = listSessionFiles(args.sessions)
+    trie = CommandTrie(readSessionFile(sessionFile) for sessionFile in sessionFiles)
+  except Exception as e:
+    print(str(e))
+    exit(1)
+
+  start = time.perf_counter()
+  evaluator = PrefixEvaluator(siteMap, trie)
+  results = evaluator.evaluate()
+  elapsed = time.perf_counter() - start
+
+  if not args.quiet:
+    print('{0:<16} {1:>10} {2:>12}  {3}'.format("Termination", "Commands", "Total cost", "Session"))
+    for sessionFile, result in zip(sessionFiles, results):
+      print('{0:<16} {1:>10} {2:>12}  {3}'.format(terminationNames[result.terminationReason],
+                                                  result.getCommandCount(), getTotalCost(result.costQuantity),
+                                                  sessionFile))
+  print("\nGraded {} scripts of {} commands in {:.2f} s, executing {} commands over {} unique prefixes".format(
+    trie.scriptCount, trie.commandCount, elapsed, evaluator.executedCommands, trie.edgeCount))
+
+  if args.database:
+    fingerprint = fileContentHash(args.sitemap)
+    with ResultsStore(args.database) as store:
+      for sessionFile, result in zip(sessionFiles, results):
+        store.addRow(sessionRow(fingerprint, traineeFromPath(sessionFile), sessionSource(sessionFile), result))
+    print("Stored the grades in {}".format(args.database))
@@ -0,0 +1,42 @@
+# Driver program for cross-session coverage heat maps
+# Replays an archive of sessions on one site map and writes the per-square counts
+# as CSV or NumPy files together with a rendered heat map
+
+#!/usr/bin/python
+
+import argparse
+import os
+
+from core.coverage_heatmap import buildHeatmap, layerNames
+from core.session import listSessionFiles
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Coverage heat maps of archived simulation sessions")
+  parser.add_argument("sitemap", help="path to the site map file")
+  parser.add_argument("sessions", nargs="+", help="session files or directories of session files")
+  parser.add_argument("--output", default="heatmap", help="output directory")
+  parser.add_argument("--format", choices=["csv", "npz"], default="npz", help="format of the counts")
+  parser.add_argument("--layer", choices=layerNames, default="visits", help="layer of the rendered heat map")
+  parser.add_argument("--scale", type=int, default=1, help="pixels per square block of the heat map")
+  parser.add_argument("--workers", type=int, default=None, help="number of processes")
+  return parser.parse_args()
+
+if __name__ == "__main__":
+  args = parseArguments()
+  try:
+    heatmap = buildHeatmap(args.sitemap, listSessionFiles(args.sessions), args.workers)
+  except Exception as e:
+    print(str(e))
+    exit(1)
+
+  if not os.path.isdir(args.output):
+    os.makedirs(args.output)
+  if args.format == "csv":
+    heatmap.saveCsv(args.output)
+  else:
+    heatmap.saveNumpy(os.path.join(args.output, "counts.npz"))
+  heatmap.render(os.path.join(args.output, args.layer + ".png"), args.layer, args.scale)
+  print("Replayed {} sessions, results are written to {}".format(heatmap.sessions, args.output))
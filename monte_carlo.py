@@ -0,0 +1,48 @@
+# Driver program for Monte Carlo calibration of site difficulty
+# Simulates many agents issuing random commands on a site map at once
+# and prints the distribution of their total costs
+
+#!/usr/bin/python
+
+import argparse
+
+import numpy as np
+
+from core.map_cache import loadSiteMap
+from core.batch_engine import simulateRandomPolicies, terminationReasons, RUNNING
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Cost distribution of random command policies on a site map")
+  parser.add_argument("sitemap", help="path to the site map file")
+  parser.add_argument("--agents", type=int, default=1000, help="number of simulated agents")
+  parser.add_argument("--ticks", type=int, default=100, help="number of commands per agent")
+  parser.add_argument("--max-advance", type=int, default=5, help="longest advance of a random command")
+  parser.add_argument("--quit-probability", type=float, default=0.0, help="probability of a quit command")
+  parser.add_argument("--seed", type=int, default=None, help="seed of the random number generator")
+  return parser.parse_args()
+
+if __name__ == "__main__":
+  args = parseArguments()
+  try:
+    siteMap = loadSiteMap(args.sitemap)
+  except Exception as e:
+    print(str(e))
+    exit(1)
+
+  engine = simulateRandomPolicies(siteMap, args.agents, args.ticks, args.max_advance,
+                                  args.seed, args.quit_probability)
+  totals = engine.getTotalCosts()
+
+  print("\nTotal cost of {} random agents over {} commands:\n".format(args.agents, args.ticks))
+  for name, value in [("minimum", totals.min()), ("10th percentile", np.percentile(totals, 10)),
+                      ("median", np.median(totals)), ("mean", totals.mean()),
+                      ("90th percentile", np.percentile(totals, 90)), ("maximum", totals.max())]:
+    print('{0:<30} {1:>20.1f}'.format(name, value))
+
+  print("\nHow the agents ended:\n")
+  print('{0:<60} {1:>10}'.format("Still running", int((engine.termination == RUNNING).sum())))
+  for code, message in sorted(terminationReasons.items()):
+    print('{0:<60} {1:>10}'.format(message.strip(), int((engine.termination == code).sum())))
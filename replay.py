@@ -0,0 +1,92 @@
+# Driver program for stepping through a recorded simulation session
+# Shows the site map, the bulldozer and the costs after any command of the session,
+# moving forwards, backwards or directly to a given command
+
+#!/usr/bin/python
+
+import argparse
+
+from core.map_cache import loadSiteMap
+from core.session import readSessionFile
+from core.replay import SessionReplay
+from core.simulator_exceptions import INVALIDKEYFRAMEINTERVAL
+
+def keyframeInterval(value):
+  """
+  Converts the --keyframe argument to a number of commands, which must be at least 1
+  :param value(str): the argument
+  :rtype: int
+  """
+  try:
+    interval = int(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError("{} is not a number of commands".format(value))
+  if interval < 1:
+    raise argparse.ArgumentTypeError(INVALIDKEYFRAMEINTERVAL.format(interval))
+  return interval
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Step through a recorded simulation session")
+  parser.add_argument("sitemap", help="path to the site map file")
+  parser.add_argument("session", help="path to the session file")
+  parser.add_argument("--keyframe", type=keyframeInterval, default=50, help="number of commands between two keyframes")
+  return parser.parse_args()
+
+def readNextCommand():
+  """
+  Reads the user command. Accepts both lowercase and uppercase
+  """
+  command = input("(n)ext, (p)revious, (g)oto <step>, (s)tart, (e)nd, (q)uit: ")
+  return command.strip().lower()
+
+def showState(state, stepCount):
+  """
+  Prints out the site map, the bulldozer and the costs of a replay state
+  :param state(ReplayState): the state to show
+  :param stepCount(int): number of commands of the session
+  """
+  state.getSiteMap().show()
+  print("\nStep {} of {}".format(state.step, stepCount))
+  if state.history:
+    print("Last command: {}".format(state.history[-1]))
+  print("The bulldozer is at row {}, column {}, facing {}\n".format(
+    state.location.row, state.location.column, state.direction.name.lower()))
+  state.getExpense().generateCostReport()
+  if state.terminationReason is not None:
+    print("\n" + state.terminationReason)
+
+if __name__ == "__main__":
+  args = parseArguments()
+  try:
+    siteMap = loadSiteMap(args.sitemap)
+    commands = readSessionFile(args.session)
+  except Exception as e:
+    print(str(e))
+    exit(1)
+
+  replay = SessionReplay(siteMap, commands, args.keyframe)
+  stepCount = replay.getStepCount()
+  showState(replay.seek(0), stepCount)
+
+  command = readNextCommand()
+  while command not in ["q", "quit"]:
+    parts = command.split()
+    if command in ["n", "next", ""]:
+      state = replay.seek(replay.step + 1)
+    elif command in ["p", "previous"]:
+      state = replay.seek(replay.step - 1)
+    elif command in ["s", "start"]:
+      state = replay.seek(0)
+    elif command in ["e", "end"]:
+      state = replay.seek(stepCount)
+    elif len(parts) == 2 and parts[0] in ["g", "goto"] and parts[1].isdigit():
+      state = replay.seek(int(parts[1]))
+    else:
+      print("{} is not an acceptable command, please try again.\n".format(command))
+      command = readNextCommand()
+      continue
+    showState(state, stepCount)
+    command = readNextCommand()
@@ -0,0 +1,95 @@
+# Driver program for the session results store
+# Ingests archives of finished sessions into a local SQLite database,
+# and answers questions over all of them without replaying the sessions
+
+#!/usr/bin/python
+
+import argparse
+import os
+import time
+
+from core.disk_cache import getCacheDirectory, fileContentHash
+from core.session import listSessionFiles
+from core.results_store import ResultsStore, ingestSessions, sessionColumns, terminationNames
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Store and query the results of simulation sessions")
+  parser.add_argument("--database", default=None,
+                      help="path to the results database, kept in the simulator cache directory by default")
+  commands = parser.add_subparsers(dest="command")
+
+  ingest = commands.add_parser("ingest", help="replay session files and store their results")
+  ingest.add_argument("sitemap", help="path to the site map file of the sessions")
+  ingest.add_argument("sessions", nargs="+", help="session files or directories of session files")
+  ingest.add_argument("--trainee", default=None,
+                      help="trainee ID of all the sessions, the directory of each session file by default")
+  ingest.add_argument("--workers", type=int, default=None, help="number of processes")
+
+  lowest = commands.add_parser("lowest", help="sessions with the lowest total cost on a site map")
+  lowest.add_argument("map", help="path to the site map file, or its fingerprint")
+  lowest.add_argument("--limit", type=int, default=100, help="number of sessions")
+
+  treeHits = commands.add_parser("tree-hits", help="sessions that hit a protected tree within a number of commands")
+  treeHits.add_argument("--within", type=int, default=10, help="largest number of commands")
+  treeHits.add_argument("--map", default=None, help="path to the site map file, or its fingerprint")
+  treeHits.add_argument("--limit", type=int, default=None, help="number of sessions")
+
+  find = commands.add_parser("find", help="sessions matching all the given filters")
+  find.add_argument("--map", default=None, help="path to the site map file, or its fingerprint")
+  find.add_argument("--trainee", default=None, help="trainee ID")
+  find.add_argument("--termination", choices=sorted(terminationNames.values()), default=None)
+  find.add_argument("--max-commands", type=int, default=None, help="largest number of commands")
+  find.add_argument("--order-by", choices=sessionColumns, default="total_cost", help="column to sort by")
+  find.add_argument("--limit", type=int, default=100, help="number of sessions")
+
+  args = parser.parse_args()
+  if args.command is None:
+    parser.print_help()
+    exit(1)
+  return args
+
+def getFingerprint(siteMap):
+  """
+  Returns the fingerprint of a site map given as a file path or as a fingerprint
+  :param siteMap(str): path to the site map file, or its fingerprint
+  :rtype: str
+  """
+  if siteMap is None or not os.path.isfile(siteMap):
+    return siteMap
+  return fileContentHash(siteMap)
+
+def printSessions(sessions, elapsed):
+  """
+  Prints the given sessions as a table
+  """
+  columns = ["trainee", "termination", "command_count", "total_cost", "source"]
+  print('{0:<16} {1:<16} {2:>10} {3:>12}  {4}'.format("Trainee", "Termination", "Commands", "Total cost", "Session"))
+  for session in sessions:
+    print('{0:<16} {1:<16} {2:>10} {3:>12}  {4}'.format(*[session[column] for column in columns]))
+  print("\n{} sessions in {:.1f} ms".format(len(sessions), elapsed * 1000))
+
+if __name__ == "__main__":
+  args = parseArguments()
+  databasePath = args.database or os.path.join(getCacheDirectory("results"), "sessions.sqlite")
+  try:
+    with ResultsStore(databasePath) as store:
+      start = time.perf_counter()
+      if args.command == "ingest":
+        count = ingestSessions(store, args.sitemap, listSessionFiles(args.sessions), args.trainee, args.workers)
+        print("Stored {} sessions in {:.1f} s".format(count, time.perf_counter() - start))
+      elif args.command == "lowest":
+        sessions = store.getLowestCostSessions(getFingerprint(args.map), args.limit)
+        printSessions(sessions, time.perf_counter() - start)
+      elif args.command == "tree-hits":
+        sessions = store.getProtectedTreeHits(args.within, getFingerprint(args.map), args.limit)
+        printSessions(sessions, time.perf_counter() - start)
+      else:
+        sessions = store.findSessions(getFingerprint(args.map), args.trainee, args.termination,
+                                      args.max_commands, args.order_by, args.limit)
+        printSessions(sessions, time.perf_counter() - start)
+  except Exception as e:
+    print(str(e))
+    exit(1)
@@ -6,8 +6,13 @@
 
 import sys
 
-from core.site_map import SiteMap
 from core.bulldozer import Bulldozer
+from core.session import isValidCommand
+from core.map_cache import loadSiteMap
+from core.sparse_site_map import SparseSiteMap
+
+# number of chokepoints listed with --chokepoints
+chokepointsShown = 20
 
 def help():
   """
@@ -15,7 +20,42 @@ def help():
   Will be called whenever the program is called in an incorrect way
   """
   print("Please run the simulator according to the following insruction: ")
-  print("python3 simulator.py <Path-to-sitemap-file>")
+  print("python3 simulator.py <Path-to-sitemap-file> [--sparse] [--zones <Path-to-zone-file>] [--reachability] [--chokepoints]")
+  print("--sparse stores only the rocks and trees, for very large sites that are mostly plain land")
+  print("--reachability reports the square blocks that protected trees cut off from the entry point")
+  print("--chokepoints lists the square blocks through which the bulldozer must pass to reach parts of the site")
+  print("--zones breaks down the uncleared squares of the final report by the zones of the file")
+
+def parseArguments(arguments):
+  """
+  Parses the command line arguments
+  Returns the site map file, whether to use a sparse site map, the zone file, whether to report
+  the unreachable square blocks and whether to list the chokepoints, or None if the arguments are not valid
+  :param arguments(list): the command line arguments, without the program name
+  :rtype: tuple
+  """
+  if len(arguments) == 0:
+    return None
+  siteMapFile = arguments[0]
+  sparse = False
+  zoneFile = None
+  reachability = False
+  chokepoints = False
+  i = 1
+  while i < len(arguments):
+    if arguments[i] == "--sparse":
+      sparse = True
+    elif arguments[i] == "--zones" and i + 1 < len(arguments):
+      i += 1
+      zoneFile = arguments[i]
+    elif arguments[i] == "--reachability":
+      reachability = True
+    elif arguments[i] == "--chokepoints":
+      chokepoints = True
+    else:
+      return None
+    i += 1
+  return siteMapFile, sparse, zoneFile, reachability, chokepoints
 
 def readNextCommand():
   """
@@ -31,37 +71,48 @@ def isValid(commandStr):
   :param commandStr(str): entered command
   :rtype: bool
   """
-  validCommands = ['left', 'l', 'right', 'r', 'quit', 'q']
-  validMultipartCommands = ['advance', 'a']
-  if commandStr in validCommands:
-    return True
-  for command in validMultipartCommands:
-    # Only advance command is a two-part command
-    if commandStr.startswith(command) and len(commandStr.split()) == 2:
-      try:
-        squares = int(commandStr.split()[1])
-        # Number of advancement steps cannot be less than 1
-        if squares <= 0:
-          return False
-        return True
-      except ValueError:
-        return False
-  return False
+  return isValidCommand(commandStr)
 
 # The main simulation process:
 if __name__ == "__main__":
-  if len(sys.argv) != 2:
+  arguments = parseArguments(sys.argv[1:])
+  if arguments is None:
     help()
     exit(1)
 
-  # Read site map from the input file
-  siteMapFile = sys.argv[1]
+  # Read site map from the input file, or from the cache if the file has not changed
+  siteMapFile, sparse, zoneFile, reachability, showChokepoints = arguments
   try:
-    siteMap = SiteMap(siteMapFile)
+    if sparse:
+      siteMap = SparseSiteMap(siteMapFile)
+    else:
+      siteMap = loadSiteMap(siteMapFile)
+    zones = None
+    if zoneFile:
+      # The zone counts need NumPy, which is only imported when zones are given
+      from core.region_stats import RegionStats, readZoneFile
+      zones = readZoneFile(zoneFile)
+
+    # Find the square blocks that protected trees cut off from the entry point, from the cached
+    # cost bound of the site map so that each site map is only analysed once
+    unreachableSquares = 0
+    if reachability:
+      from core.cost_bound import getLowerBound
+      unreachableSquares = getLowerBound(siteMapFile, siteMap=siteMap).unreachableSquares
+    chokepoints = None
+    if showChokepoints:
+      from core.reachability import RegionAnalysis
+      chokepoints = RegionAnalysis(siteMap).getChokepoints()
   except Exception as e:
     print(str(e))
     exit(1)
 
+  # Count the square blocks of the zones as they are cleared
+  regionStats = None
+  if zones:
+    regionStats = RegionStats(siteMap)
+    siteMap.attachRegionStats(regionStats)
+
   # Create a bulldozer object on the created siteMap
   bulldozer = Bulldozer(siteMap)
 
@@ -69,6 +120,17 @@ if __name__ == "__main__":
   bulldozer.siteMap.show()
   print("\nThe bulldozer is currently located at the Northern edge of the site, immediately to the West of the site, and facing East.\n")
 
+  # Let the user know about the square blocks that protected trees cut off from the entry point
+  if unreachableSquares > 0:
+    print("{} square blocks of this site cannot be reached without hitting a protected tree, they will stay uncleared.\n".format(
+      unreachableSquares))
+  if chokepoints == []:
+    print("The bulldozer can reach every part of the site in more than one way, there are no chokepoints.\n")
+  elif chokepoints is not None:
+    print("The bulldozer must pass through {} square blocks (row, column) to reach parts of the site: {}\n".format(
+      len(chokepoints), ", ".join(str(point) for point in chokepoints[:chokepointsShown]) +
+      (", ..." if len(chokepoints) > chokepointsShown else "")))
+
   # While the user enters a non-quit command and bulldozer can accept commands, read the command
   command = readNextCommand()
   while True:
@@ -83,7 +145,7 @@ if __name__ == "__main__":
         print(str(e))
         print("The final status of the site is shown below: \n")
         bulldozer.siteMap.show()
-        bulldozer.generateReport()
+        bulldozer.generateReport(zones)
         break
     else:
       # Don't exit the program if the command is not valid, ask for a valid command instead
@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+import numpy as np
+
+from core.site_map import SiteMap
+from core.session import readSessionFile, replaySession
+from core.batch_engine import BatchEngine, encodeScripts, simulateRandomPolicies
+
+
+class TestBatchEngine(TestCase):
+    def set_up(self):
+        pass
+
+    def tear_down(Self):
+        pass
+
+    def test_run_matches_session_replay(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        codes = siteMap.toCodes()
+        scripts = [
+            readSessionFile("./test/fixtures/session1.txt"),
+            readSessionFile("./test/fixtures/session2.txt"),
+            ["a 1", "r", "a 1", "l", "a 7", "a 1"],
+            ["a 2", "q", "a 3"],
+            ["a 3", "a 1", "r", "r", "a 2"],
+            []
+        ]
+        engine = BatchEngine(siteMap, len(scripts))
+        engine.run(*encodeScripts(scripts))
+        for agent, commands in enumerate(scripts):
+            result = replaySession(codes, siteMap.rows, siteMap.columns, commands)
+            TestCase.assertDictEqual(self, engine.getCostQuantity(agent), result.costQuantity)
+            TestCase.assertEqual(self, engine.getLocation(agent).row, result.location.row)
+            TestCase.assertEqual(self, engine.getLocation(agent).column, result.location.column)
+            TestCase.assertEqual(self, engine.getTerminationReason(agent), result.terminationReason)
+            TestCase.assertEqual(self, engine.commandCount[agent], result.getCommandCount())
+            expectedCodes = bytearray(codes)
+            for index in result.cleared:
+                expectedCodes[index] = 4
+            TestCase.assertEqual(self, engine.getCodes(agent), expectedCodes)
+        # The shared site map is not modified
+        TestCase.assertEqual(self, siteMap.toCodes(), codes)
+
+    def test_total_costs(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        engine = BatchEngine(siteMap, 2)
+        engine.run(*encodeScripts([["a 4", "r", "a 2"], []]))
+        # Same commands as the generated report of the bulldozer tests
+        TestCase.assertEqual(self, list(engine.getTotalCosts()), [138, 144])
+
+    def test_simulate_random_policies(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        first = simulateRandomPolicies(siteMap, 64, 20, 5, seed=7)
+        second = simulateRandomPolicies(siteMap, 64, 20, 5, seed=7)
+        TestCase.assertEqual(self, np.array_equal(first.getTotalCosts(), second.getTotalCosts()), True)
+        TestCase.assertEqual(self, bool((first.commandCount <= 20).all()), True)
+        TestCase.assertEqual(self, bool((first.getTotalCosts() > 0).all()), True)
@@ -0,0 +1,48 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import mock
+
+from core.site_map import SiteMap
+from core.cost_bound import estimateLowerBound, getLowerBound
+
+
+class TestCostBound(TestCase):
+    def setUp(self):
+        self.cacheDirectory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cacheDirectory)
+
+    def test_estimate_lower_bound(self):
+        bound = estimateLowerBound(SiteMap("./test/fixtures/sample1.txt"))
+        TestCase.assertEqual(self, bound.reachableSquares, 48)
+        TestCase.assertEqual(self, bound.unreachableSquares, 0)
+        TestCase.assertEqual(self, bound.minFuel, 62)
+        TestCase.assertEqual(self, bound.minCommands, 9)
+        TestCase.assertEqual(self, bound.totalCost, 67)
+
+    def test_estimate_lower_bound_unreachable(self):
+        bound = estimateLowerBound(SiteMap("./test/fixtures/sample_unreachable.txt"))
+        TestCase.assertEqual(self, bound.reachableSquares, 2)
+        TestCase.assertEqual(self, bound.unreachableSquares, 6)
+        TestCase.assertEqual(self, bound.getUnavoidableUnclearedCost(), 18)
+        TestCase.assertEqual(self, bound.minFuel, 2)
+        TestCase.assertEqual(self, bound.minCommands, 1)
+        TestCase.assertEqual(self, bound.totalCost, 21)
+
+    def test_get_lower_bound_is_cached(self):
+        bound = getLowerBound("./test/fixtures/sample1.txt", self.cacheDirectory)
+        TestCase.assertEqual(self, len(os.listdir(self.cacheDirectory)), 1)
+        with mock.patch('core.cost_bound.estimateLowerBound') as mock_estimate:
+            cachedBound = getLowerBound("./test/fixtures/sample1.txt", self.cacheDirectory)
+            TestCase.assertEqual(self, mock_estimate.called, False)
+        TestCase.assertDictEqual(self, cachedBound.toDict(), bound.toDict())
+
+    def test_get_lower_bound_without_cache(self):
+        # A directory inside a regular file can neither be created nor written
+        cacheDirectory = os.path.join("./test/fixtures/sample1.txt", "bounds")
+        bound = getLowerBound("./test/fixtures/sample1.txt", cacheDirectory)
+        TestCase.assertEqual(self, bound.totalCost, 67)
@@ -0,0 +1,62 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from core.site_map import SiteMap
+from core.session import readSessionFile
+import core.coverage_heatmap as coverage_heatmap
+from core.coverage_heatmap import CoverageHeatmap, buildHeatmap
+
+
+class TestCoverageHeatmap(TestCase):
+    def setUp(self):
+        self.outputDirectory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outputDirectory)
+
+    def test_add_sessions(self):
+        heatmap = CoverageHeatmap(SiteMap("./test/fixtures/sample1.txt"))
+        heatmap.addSessions([readSessionFile("./test/fixtures/session1.txt"),
+                             readSessionFile("./test/fixtures/session2.txt")])
+        TestCase.assertEqual(self, heatmap.sessions, 2)
+        # Both sessions start with the same advance over a removable tree
+        TestCase.assertEqual(self, heatmap.getLayer("visits")[0, 0], 2)
+        TestCase.assertEqual(self, heatmap.getLayer("tree_hits")[0, 2], 2)
+        TestCase.assertEqual(self, heatmap.getLayer("stops")[0, 3], 2)
+        TestCase.assertEqual(self, heatmap.getLayer("stops")[2, 6], 1)
+        # Only the second session leaves the site, from the western edge
+        TestCase.assertEqual(self, heatmap.getLayer("terminations").sum(), 1)
+        TestCase.assertEqual(self, heatmap.getLayer("terminations")[2, 0], 1)
+
+    def test_build_heatmap_in_parallel(self):
+        sessionFiles = ["./test/fixtures/session1.txt", "./test/fixtures/session2.txt"] * 4
+        serial = buildHeatmap("./test/fixtures/sample1.txt", sessionFiles, workers=1)
+        threshold = coverage_heatmap.parallelThreshold
+        coverage_heatmap.parallelThreshold = 0
+        try:
+            parallel = buildHeatmap("./test/fixtures/sample1.txt", sessionFiles, workers=2, batchSize=3)
+        finally:
+            coverage_heatmap.parallelThreshold = threshold
+        TestCase.assertEqual(self, parallel.sessions, 8)
+        TestCase.assertEqual(self, np.array_equal(serial.counts, parallel.counts), True)
+
+    def test_save_and_render(self):
+        heatmap = buildHeatmap("./test/fixtures/sample1.txt", ["./test/fixtures/session1.txt"])
+        heatmap.saveCsv(self.outputDirectory)
+        visits = np.loadtxt(os.path.join(self.outputDirectory, "visits.csv"), delimiter=",")
+        TestCase.assertEqual(self, visits.shape, (5, 10))
+        TestCase.assertEqual(self, visits.sum(), 9)
+
+        heatmap.saveNumpy(os.path.join(self.outputDirectory, "counts.npz"))
+        saved = np.load(os.path.join(self.outputDirectory, "counts.npz"))
+        TestCase.assertEqual(self, int(saved["sessions"]), 1)
+        TestCase.assertEqual(self, np.array_equal(saved["stops"], heatmap.getLayer("stops")), True)
+
+        imagePath = os.path.join(self.outputDirectory, "visits.png")
+        heatmap.render(imagePath, scale=4)
+        with open(imagePath, "rb") as f:
+            TestCase.assertEqual(self, f.read(8), b"\x89PNG\r\n\x1a\n")
@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from core.expense import CostItem
+from core.fuzz import (
+    FuzzCase,
+    referenceEngine,
+    sessionEngine,
+    compareOutcomes,
+    shrinkCase,
+    runFuzz
+)
+
+
+def engineWithoutPaintDamage(case):
+    """
+    A broken engine that never charges paint damage
+    """
+    outcome = sessionEngine(case)
+    outcome.costQuantity[CostItem.PAINT_DAMAGE] = 0
+    return outcome
+
+
+def engineFailingOnRightTurns(case):
+    """
+    A broken engine that raises an exception on right turns
+    """
+    if any(commandStr in ["r", "right"] for commandStr in case.commands):
+        raise IndexError("turn right not supported")
+    return sessionEngine(case)
+
+
+class TestFuzz(TestCase):
+    def set_up(self):
+        pass
+
+    def tear_down(Self):
+        pass
+
+    def test_engines_agree(self):
+        report = runFuzz(300, seed=3)
+        TestCase.assertEqual(self, report.cases, 300)
+        TestCase.assertEqual(self, report.failures, [])
+        TestCase.assertEqual(self, sorted(report.getExecutionsPerSecond().keys()), ["batch", "reference", "session", "sparse"])
+
+    def test_same_seed_same_cases(self):
+        first = runFuzz(20, seed=5, engines={})
+        second = runFuzz(20, seed=5, engines={})
+        TestCase.assertEqual(self, first.cases, second.cases)
+        TestCase.assertEqual(self, list(first.seconds.keys()), ["reference"])
+
+    def test_compare_outcomes(self):
+        # Pass through a removable tree, then leave the site
+        case = FuzzCase(bytes([0, 2, 0]), 1, 3, ["a 3", "a 5"])
+        expected = referenceEngine(case)
+        TestCase.assertEqual(self, compareOutcomes(expected, sessionEngine(case)), [])
+        differences = compareOutcomes(expected, engineWithoutPaintDamage(case))
+        TestCase.assertEqual(self, differences, ["PAINT_DAMAGE is 0 instead of 1"])
+
+    def test_shrink_case(self):
+        case = FuzzCase(bytes([0, 1, 2, 0, 3, 4, 0, 0, 2, 1, 0, 0]), 3, 4,
+                        ["r", "l", "a 4", "r", "a 2", "l", "a 1", "q"])
+        shrunk = shrinkCase(case, engineWithoutPaintDamage)
+        # The smallest case passes through a single removable tree and leaves the site
+        TestCase.assertEqual(self, shrunk.describe(), "t\n\ncommands: a 2")
+
+    def test_run_fuzz_reports_failures(self):
+        report = runFuzz(200, seed=1, engines={"broken": engineWithoutPaintDamage}, maxFailures=2)
+        TestCase.assertEqual(self, len(report.failures), 2)
+        name, case, differences = report.failures[0]
+        TestCase.assertEqual(self, name, "broken")
+        TestCase.assertEqual(self, case.commands, ["a 2"])
+        TestCase.assertEqual(self, differences, ["PAINT_DAMAGE is 0 instead of 1"])
+
+    def test_run_fuzz_reports_exceptions(self):
+        report = runFuzz(50, seed=1, engines={"crashing": engineFailingOnRightTurns}, maxFailures=1)
+        TestCase.assertEqual(self, len(report.failures), 1)
+        name, case, differences = report.failures[0]
+        TestCase.assertEqual(self, name, "crashing")
+        # The exception is shrunk like any other failure
+        TestCase.assertEqual(self, (case.rows, case.columns, len(case.commands)), (1, 1, 1))
+        TestCase.assertEqual(self, differences, ["raised IndexError: turn right not supported"])
@@ -0,0 +1,86 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import mock
+
+from core.site_map import SiteMap
+from core.disk_cache import CACHEENVIRONMENTVARIABLE
+from core.map_cache import loadSiteMap, loadSiteCodes, warmCache
+
+
+class TestMapCache(TestCase):
+    def setUp(self):
+        self.cacheDirectory = tempfile.mkdtemp()
+        self.mapDirectory = tempfile.mkdtemp()
+        self.mapFile = os.path.join(self.mapDirectory, "site.txt")
+        shutil.copy("./test/fixtures/sample1.txt", self.mapFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.cacheDirectory)
+        shutil.rmtree(self.mapDirectory)
+
+    def test_load_site_map(self):
+        expected = SiteMap("./test/fixtures/sample1.txt")
+        siteMap = loadSiteMap(self.mapFile, self.cacheDirectory)
+        TestCase.assertEqual(self, siteMap.siteMap, expected.siteMap)
+
+        # The second load is served from the cache without parsing the file
+        with mock.patch('core.site_map.SiteMap.readFromFile') as mock_read:
+            cachedSiteMap = loadSiteMap(self.mapFile, self.cacheDirectory)
+            TestCase.assertEqual(self, mock_read.called, False)
+        TestCase.assertEqual(self, cachedSiteMap.rows, 5)
+        TestCase.assertEqual(self, cachedSiteMap.columns, 10)
+        TestCase.assertEqual(self, cachedSiteMap.siteMap, expected.siteMap)
+
+    def test_load_site_codes(self):
+        expected = SiteMap("./test/fixtures/sample1.txt")
+        loadSiteMap(self.mapFile, self.cacheDirectory)
+        with mock.patch('core.site_map.SiteMap.fromCodes') as mock_build:
+            codes, rows, columns = loadSiteCodes(self.mapFile, self.cacheDirectory)
+            TestCase.assertEqual(self, mock_build.called, False)
+        TestCase.assertEqual(self, (bytes(codes), rows, columns), (bytes(expected.toCodes()), 5, 10))
+
+    def test_unusable_cache_directory(self):
+        expected = SiteMap("./test/fixtures/sample1.txt")
+        # A directory inside a regular file can neither be created nor written
+        cacheDirectory = os.path.join(self.mapFile, "cache")
+        TestCase.assertEqual(self, loadSiteMap(self.mapFile, cacheDirectory).siteMap, expected.siteMap)
+        with mock.patch.dict(os.environ, {CACHEENVIRONMENTVARIABLE: cacheDirectory}):
+            TestCase.assertEqual(self, loadSiteMap(self.mapFile).siteMap, expected.siteMap)
+        with mock.patch('core.map_cache.writeAtomically', side_effect=OSError("No space left on device")):
+            TestCase.assertEqual(self, loadSiteMap(self.mapFile, self.cacheDirectory).siteMap, expected.siteMap)
+
+    def test_damaged_index(self):
+        loadSiteMap(self.mapFile, self.cacheDirectory)
+        for name in os.listdir(self.cacheDirectory):
+            if name.endswith(".json"):
+                with open(os.path.join(self.cacheDirectory, name), "w") as f:
+                    f.write('{"mtime": 0}')
+        siteMap = loadSiteMap(self.mapFile, self.cacheDirectory)
+        TestCase.assertEqual(self, siteMap.siteMap, SiteMap("./test/fixtures/sample1.txt").siteMap)
+
+    def test_cache_invalidated_on_change(self):
+        loadSiteMap(self.mapFile, self.cacheDirectory)
+        with open(self.mapFile, "w") as f:
+            f.write("ooo\nrTt\n")
+        siteMap = loadSiteMap(self.mapFile, self.cacheDirectory)
+        TestCase.assertEqual(self, siteMap.rows, 2)
+        TestCase.assertEqual(self, siteMap.columns, 3)
+        TestCase.assertEqual(self, siteMap.toCodes(), bytearray([0, 0, 0, 1, 3, 2]))
+
+    def test_invalid_file_is_not_cached(self):
+        shutil.copy("./test/fixtures/invalid_sample2.txt", self.mapFile)
+        with TestCase.assertRaises(self, Exception):
+            loadSiteMap(self.mapFile, self.cacheDirectory)
+        TestCase.assertEqual(self, os.listdir(self.cacheDirectory), [])
+
+    def test_warm_cache(self):
+        shutil.copy("./test/fixtures/invalid_sample1.txt", os.path.join(self.mapDirectory, "invalid.txt"))
+        cached, failed = warmCache(self.mapDirectory, self.cacheDirectory)
+        TestCase.assertEqual(self, cached, [self.mapFile])
+        TestCase.assertEqual(self, len(failed), 1)
+        with mock.patch('core.site_map.SiteMap.readFromFile') as mock_read:
+            loadSiteMap(self.mapFile, self.cacheDirectory)
+            TestCase.assertEqual(self, mock_read.called, False)
@@ -0,0 +1,98 @@
+from unittest import TestCase
+import mmap
+import os
+import shutil
+import tempfile
+
+import mock
+
+from core.site_map import SiteMap
+from core.map_cache import loadSiteMap
+from core.parallel_loader import loadCodes, loadSiteMapParallel, splitLines
+from core.simulator_exceptions import (
+    FILENOTEXIST,
+    EMPTYFILE,
+    UNACCEPTABLESQUAREAT,
+    NOTAGRIDAT,
+    SITEMAPERRORS
+)
+
+
+class TestParallelLoader(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeMap(self, content):
+        filePath = os.path.join(self.directory, "site.txt")
+        with open(filePath, "wb") as f:
+            f.write(content)
+        return filePath
+
+    def test_split_lines(self):
+        filePath = self.writeMap(b"oooo\nrrrr\ntttt\nTTTT")
+        with open(filePath, "rb") as f:
+            fileMap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with fileMap:
+            TestCase.assertEqual(self, splitLines(fileMap, 6), [(0, 10), (10, 19)])
+            TestCase.assertEqual(self, splitLines(fileMap, 1), [(0, 5), (5, 10), (10, 15), (15, 19)])
+            TestCase.assertEqual(self, splitLines(fileMap, 100), [(0, 19)])
+
+    def test_load_codes(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        for workers, chunkSize in [(1, 1 << 20), (1, 8), (2, 8), (2, 25)]:
+            codes, rows, columns = loadCodes("./test/fixtures/sample1.txt", workers, chunkSize)
+            TestCase.assertEqual(self, (rows, columns), (5, 10))
+            TestCase.assertEqual(self, codes, siteMap.toCodes())
+        parallelSiteMap = loadSiteMapParallel("./test/fixtures/sample1.txt", 2, 8)
+        TestCase.assertEqual(self, parallelSiteMap.siteMap, siteMap.siteMap)
+
+    def test_line_breaks(self):
+        filePath = self.writeMap(b"ootr\r\nTT*o\r\noooo")
+        codes, rows, columns = loadCodes(filePath, 2, 4)
+        TestCase.assertEqual(self, (rows, columns), (3, 4))
+        TestCase.assertEqual(self, codes, SiteMap(filePath).toCodes())
+
+    def test_errors_are_merged(self):
+        filePath = self.writeMap(b"ootr\noxoo\noo\nooooo\noooM\n\n")
+        messages = [
+            UNACCEPTABLESQUAREAT.format(2, 2, "x"),
+            NOTAGRIDAT.format(3, 2, 4),
+            NOTAGRIDAT.format(4, 5, 4),
+            UNACCEPTABLESQUAREAT.format(5, 4, "M"),
+            NOTAGRIDAT.format(6, 0, 4)
+        ]
+        for workers in [1, 2]:
+            with TestCase.assertRaises(self, Exception) as e:
+                loadCodes(filePath, workers, 3)
+            TestCase.assertEqual(self, str(e.exception), SITEMAPERRORS.format(5, "\n".join(messages)))
+
+    def test_all_errors_are_counted(self):
+        # 3 lines of 60 unacceptable characters and a short line, in a single range
+        filePath = self.writeMap(b"x" * 60 + b"\n" + b"xo" * 30 + b"\n" + b"x" * 60 + b"\n" + b"o" * 40 + b"\n")
+        messages = [UNACCEPTABLESQUAREAT.format(1, column, "x") for column in range(1, 61)] + \
+            [UNACCEPTABLESQUAREAT.format(2, column, "x") for column in range(1, 61, 2)] + \
+            [UNACCEPTABLESQUAREAT.format(3, column, "x") for column in range(1, 11)]
+        for workers, chunkSize in [(1, 1 << 20), (2, 100)]:
+            with TestCase.assertRaises(self, Exception) as e:
+                loadCodes(filePath, workers, chunkSize)
+            TestCase.assertEqual(self, str(e.exception), SITEMAPERRORS.format(151, "\n".join(messages + ["..."])))
+
+    def test_file_errors(self):
+        with TestCase.assertRaises(self, Exception) as e:
+            loadCodes("fake_path")
+        TestCase.assertEqual(self, str(e.exception), FILENOTEXIST.format("fake_path"))
+        with TestCase.assertRaises(self, Exception) as e:
+            loadCodes(self.writeMap(b""))
+        TestCase.assertEqual(self, str(e.exception), EMPTYFILE)
+
+    def test_map_cache_uses_parallel_loader(self):
+        filePath = self.writeMap(b"ootr\nTT*o\noooo\n")
+        cacheDirectory = os.path.join(self.directory, "cache")
+        os.makedirs(cacheDirectory)
+        with mock.patch("core.map_cache.parallelThreshold", 0):
+            siteMap = loadSiteMap(filePath, cacheDirectory)
+        TestCase.assertEqual(self, siteMap.toCodes(), SiteMap(filePath).toCodes())
+        TestCase.assertEqual(self, loadSiteMap(filePath, cacheDirectory).toCodes(), siteMap.toCodes())
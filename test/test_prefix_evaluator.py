@@ -0,0 +1,79 @@
+from unittest import TestCase
+import random
+
+import mock
+
+from core.site_map import SiteMap
+from core.sparse_site_map import SparseSiteMap
+from core.fuzz import FuzzCase, randomCase, referenceEngine
+from core.replay import RecordingBulldozer
+from core.simulator_exceptions import MOVEONPROTECTEDTREE, OUTOFSITEMOVE
+from core.prefix_evaluator import (
+    canonicalCommand,
+    CommandTrie,
+    PrefixEvaluator,
+    evaluateScripts
+)
+
+
+class TestPrefixEvaluator(TestCase):
+    def set_up(self):
+        pass
+
+    def tear_down(Self):
+        pass
+
+    def test_canonical_command(self):
+        TestCase.assertEqual(self, canonicalCommand("advance 4"), "a 4")
+        TestCase.assertEqual(self, canonicalCommand("Turn right"), "r")
+        TestCase.assertEqual(self, canonicalCommand("left"), "l")
+        TestCase.assertEqual(self, canonicalCommand("q"), "q")
+
+    def test_trie_shares_prefixes(self):
+        trie = CommandTrie([["a 4", "r", "a 2"], ["advance 4", "right", "a 1"], ["a 4"], []])
+        TestCase.assertEqual(self, trie.scriptCount, 4)
+        TestCase.assertEqual(self, trie.commandCount, 7)
+        TestCase.assertEqual(self, trie.edgeCount, 4)
+
+    def test_evaluate_scripts(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        scripts = [["a 4", "r", "a 2"], ["a 4", "r", "a 1", "l", "a 4"], ["a 4", "l", "a 1", "r"], []]
+        evaluator = PrefixEvaluator(siteMap, CommandTrie(scripts))
+        results = evaluator.evaluate()
+        # The shared "a 4" and "r" are executed once, and the turn after leaving the site is not executed
+        TestCase.assertEqual(self, evaluator.trie.edgeCount, 9)
+        TestCase.assertEqual(self, evaluator.executedCommands, 8)
+        TestCase.assertEqual(self, results[1].terminationReason, MOVEONPROTECTEDTREE)
+        TestCase.assertEqual(self, results[2].terminationReason, OUTOFSITEMOVE)
+        TestCase.assertEqual(self, results[2].getCommandCount(), 3)
+        TestCase.assertEqual(self, (results[3].location.row, results[3].location.column), (0, -1))
+        for commands, result in zip(scripts, results):
+            expected = referenceEngine(FuzzCase(siteMap.toCodes(), siteMap.rows, siteMap.columns, commands))
+            TestCase.assertEqual(self, result.costQuantity, expected.costQuantity)
+            TestCase.assertEqual(self, (result.location.row, result.location.column), expected.location)
+        # The site map is not modified
+        TestCase.assertEqual(self, siteMap.toCodes(), SiteMap("./test/fixtures/sample1.txt").toCodes())
+
+    def test_matches_reference_engine(self):
+        rng = random.Random(2)
+        for _ in range(100):
+            case = randomCase(rng, maxCommands=12)
+            scripts = [case.commands[:rng.randint(0, len(case.commands))] + randomCase(rng, maxCommands=5).commands
+                       for _ in range(rng.randint(1, 6))]
+            for siteMapClass in [SiteMap, SparseSiteMap]:
+                siteMap = siteMapClass.fromCodes(case.codes, case.rows, case.columns)
+                for commands, result in zip(scripts, evaluateScripts(siteMap, scripts)):
+                    expected = referenceEngine(FuzzCase(case.codes, case.rows, case.columns, commands))
+                    TestCase.assertEqual(self, result.costQuantity, expected.costQuantity)
+                    TestCase.assertEqual(self, (result.location.row, result.location.column), expected.location)
+                    TestCase.assertEqual(self, result.getCommandCount(), len(expected.history))
+                    TestCase.assertEqual(self, result.terminationReason, expected.terminationReason)
+
+    def test_sparse_site_map_stays_sparse(self):
+        siteMap = SparseSiteMap("./test/fixtures/sample1.txt")
+        with mock.patch("core.prefix_evaluator.RecordingBulldozer", wraps=RecordingBulldozer) as bulldozerClass, \
+                mock.patch("core.sparse_site_map.SparseSiteMap.toCodes") as mock_codes:
+            results = evaluateScripts(siteMap, [["a 4", "r", "a 2"]])
+            TestCase.assertEqual(self, mock_codes.called, False)
+        TestCase.assertIsInstance(self, bulldozerClass.call_args[0][0], SparseSiteMap)
+        TestCase.assertEqual(self, results[0].getCommandCount(), 3)
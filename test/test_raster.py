@@ -0,0 +1,107 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+import zlib
+
+import numpy as np
+
+from core.site_map import SiteMap, SquareType
+from core.bulldozer import Location
+from core.session import readSessionFile
+from core.replay import SessionReplay
+from core.raster import (
+    siteImage,
+    exportCodes,
+    exportSite,
+    exportSessionFrames,
+    squarePalette,
+    pathColour,
+    bulldozerColour
+)
+
+
+def readPpm(filePath):
+    with open(filePath, "rb") as f:
+        magic, size, maximum, data = f.read().split(b"\n", 3)
+    width, height = [int(value) for value in size.split()]
+    return np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+
+class TestRaster(TestCase):
+    def setUp(self):
+        self.outputDirectory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outputDirectory)
+
+    def test_site_image(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        pixels = siteImage(siteMap.toCodes(), siteMap.rows, siteMap.columns)
+        TestCase.assertEqual(self, pixels.shape, (5, 10, 3))
+        TestCase.assertEqual(self, tuple(pixels[0, 0]), squarePalette[SquareType.PLAIN])
+        TestCase.assertEqual(self, tuple(pixels[0, 2]), squarePalette[SquareType.REMOVABLE_TREE])
+        TestCase.assertEqual(self, tuple(pixels[2, 7]), squarePalette[SquareType.NONREMOVABLE_TREE])
+        TestCase.assertEqual(self, tuple(pixels[4, 0]), squarePalette[SquareType.ROCK])
+
+        pixels = siteImage(siteMap.toCodes(), siteMap.rows, siteMap.columns, scale=3)
+        TestCase.assertEqual(self, pixels.shape, (15, 30, 3))
+
+    def test_site_image_downscaled(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        pixels = siteImage(siteMap.toCodes(), siteMap.rows, siteMap.columns, downscale=4)
+        TestCase.assertEqual(self, pixels.shape, (2, 3, 3))
+        # Trees and rocks are kept over plain land
+        TestCase.assertEqual(self, tuple(pixels[0, 0]), squarePalette[SquareType.REMOVABLE_TREE])
+        TestCase.assertEqual(self, tuple(pixels[0, 1]), squarePalette[SquareType.NONREMOVABLE_TREE])
+        TestCase.assertEqual(self, tuple(pixels[1, 0]), squarePalette[SquareType.ROCK])
+        TestCase.assertEqual(self, tuple(pixels[1, 2]), squarePalette[SquareType.PLAIN])
+
+    def test_site_image_path(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        path = np.zeros((5, 10), dtype=bool)
+        path[0, :4] = True
+        pixels = siteImage(siteMap.toCodes(), siteMap.rows, siteMap.columns, path, Location(0, 3))
+        TestCase.assertEqual(self, tuple(pixels[0, 1]), tuple(pathColour))
+        TestCase.assertEqual(self, tuple(pixels[0, 3]), tuple(bulldozerColour))
+        TestCase.assertEqual(self, tuple(pixels[0, 4]), squarePalette[SquareType.PLAIN])
+
+    def test_export_site(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        ppmPath = os.path.join(self.outputDirectory, "site.ppm")
+        exportSite(siteMap, ppmPath, readSessionFile("./test/fixtures/session1.txt"))
+        pixels = readPpm(ppmPath)
+        TestCase.assertEqual(self, tuple(pixels[1, 3]), tuple(pathColour))
+        TestCase.assertEqual(self, tuple(pixels[2, 6]), tuple(bulldozerColour))
+        TestCase.assertEqual(self, tuple(pixels[4, 0]), squarePalette[SquareType.ROCK])
+
+        pngPath = os.path.join(self.outputDirectory, "site.png")
+        exportSite(siteMap, pngPath)
+        with open(pngPath, "rb") as f:
+            data = f.read()
+        TestCase.assertEqual(self, data[:8], b"\x89PNG\r\n\x1a\n")
+        # IDAT holds one filter byte and three bytes per pixel for each row
+        idat = data.index(b"IDAT")
+        length = int.from_bytes(data[idat - 4:idat], "big")
+        TestCase.assertEqual(self, len(zlib.decompress(data[idat + 4:idat + 4 + length])), 5 * 31)
+
+    def test_export_codes(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        commands = readSessionFile("./test/fixtures/session1.txt")
+        sitePath = os.path.join(self.outputDirectory, "site.ppm")
+        codesPath = os.path.join(self.outputDirectory, "codes.ppm")
+        exportSite(siteMap, sitePath, commands)
+        exportCodes(siteMap.toCodes(), siteMap.rows, siteMap.columns, codesPath, commands)
+        TestCase.assertEqual(self, np.array_equal(readPpm(sitePath), readPpm(codesPath)), True)
+
+    def test_export_session_frames(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        replay = SessionReplay(siteMap, readSessionFile("./test/fixtures/session2.txt"), keyframeInterval=2)
+        filePaths = exportSessionFrames(replay, self.outputDirectory, "ppm")
+        TestCase.assertEqual(self, len(filePaths), 6)
+        TestCase.assertEqual(self, os.path.basename(filePaths[0]), "frame_00000.ppm")
+        first = readPpm(filePaths[0])
+        last = readPpm(filePaths[-1])
+        TestCase.assertEqual(self, tuple(first[0, 1]), squarePalette[SquareType.PLAIN])
+        TestCase.assertEqual(self, tuple(last[0, 1]), tuple(pathColour))
+        TestCase.assertEqual(self, tuple(last[2, 0]), tuple(bulldozerColour))
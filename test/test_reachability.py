@@ -0,0 +1,98 @@
+from unittest import TestCase
+import random
+
+import mock
+import numpy as np
+
+from core.site_map import SiteMap
+from core.reachability import RegionAnalysis
+
+
+def bruteForceLabels(passable):
+    rows, columns = len(passable), len(passable[0])
+    labels = [[0] * columns for _ in range(rows)]
+    regionCount = 0
+    for row in range(rows):
+        for column in range(columns):
+            if passable[row][column] and not labels[row][column]:
+                regionCount += 1
+                labels[row][column] = regionCount
+                stack = [(row, column)]
+                while stack:
+                    r, c = stack.pop()
+                    for nr, nc in [(r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)]:
+                        if 0 <= nr < rows and 0 <= nc < columns and passable[nr][nc] and not labels[nr][nc]:
+                            labels[nr][nc] = regionCount
+                            stack.append((nr, nc))
+    return labels
+
+
+def bruteForceChokepoints(reachable):
+    cells = [(r, c) for r in range(len(reachable)) for c in range(len(reachable[0])) if reachable[r][c]]
+    chokepoints = []
+    for removed in cells:
+        remaining = [[reachable[r][c] and (r, c) != removed for c in range(len(reachable[0]))]
+                     for r in range(len(reachable))]
+        if max(max(row) for row in bruteForceLabels(remaining)) > 1:
+            chokepoints.append(removed)
+    return chokepoints
+
+
+class TestReachability(TestCase):
+    def set_up(self):
+        pass
+
+    def tear_down(Self):
+        pass
+
+    def test_fully_reachable_site(self):
+        analysis = RegionAnalysis(SiteMap("./test/fixtures/sample1.txt"))
+        TestCase.assertEqual(self, analysis.regionCount, 1)
+        TestCase.assertEqual(self, analysis.regionSizes[1], 48)
+        TestCase.assertEqual(self, analysis.labels[1, 7], 0)
+        TestCase.assertEqual(self, analysis.getUnreachableSquares(), 0)
+        TestCase.assertEqual(self, analysis.isReachable(4, 9), True)
+        # No single square block of the open site cuts off others
+        TestCase.assertEqual(self, analysis.getChokepoints(), [])
+
+    def test_unreachable_squares(self):
+        analysis = RegionAnalysis(SiteMap("./test/fixtures/sample_unreachable.txt"))
+        TestCase.assertEqual(self, analysis.regionCount, 2)
+        TestCase.assertEqual(self, analysis.entryRegion, 1)
+        TestCase.assertEqual(self, analysis.isReachable(0, 1), True)
+        TestCase.assertEqual(self, analysis.isReachable(0, 3), False)
+        TestCase.assertEqual(self, analysis.getUnreachableSquares(), 6)
+        TestCase.assertEqual(self, analysis.getUnreachableCost(), 18)
+        TestCase.assertEqual(self, analysis.labels.tolist(), [[1, 1, 0, 2], [0, 0, 0, 2], [2, 2, 2, 2]])
+
+    def test_regions_connect_across_rows(self):
+        siteMap = SiteMap.fromCodes(bytes([0, 3, 0, 0,
+                                           0, 3, 3, 0,
+                                           0, 0, 0, 0,
+                                           3, 3, 3, 0]), 4, 4)
+        analysis = RegionAnalysis(siteMap)
+        # The right column joins the left one through the third row
+        TestCase.assertEqual(self, analysis.regionCount, 1)
+        TestCase.assertEqual(self, analysis.getUnreachableSquares(), 0)
+        # Every square block of the winding passage but its two ends is a chokepoint
+        TestCase.assertEqual(self, analysis.getChokepoints(),
+                             [(0, 3), (1, 0), (1, 3), (2, 0), (2, 1), (2, 2), (2, 3)])
+
+    def test_protected_tree_at_entry(self):
+        siteMap = SiteMap.fromCodes(bytes([3, 0, 0, 1]), 2, 2)
+        analysis = RegionAnalysis(siteMap)
+        TestCase.assertEqual(self, analysis.entryRegion, 0)
+        TestCase.assertEqual(self, analysis.getUnreachableSquares(), 3)
+        TestCase.assertEqual(self, np.array_equal(analysis.reachable, np.zeros((2, 2), dtype=bool)), True)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(11)
+        for rows, columns in [(1, 1), (1, 9), (9, 1), (7, 8), (12, 15)]:
+            codes = bytes(rng.choices([0, 1, 2, 3, 4], weights=[5, 1, 1, 3, 1], k=rows * columns))
+            codes = bytes([0]) + codes[1:]
+            passable = [[codes[r * columns + c] != 3 for c in range(columns)] for r in range(rows)]
+            # Rows are split into blocks of a few square blocks to go through the block boundaries
+            with mock.patch("core.reachability.blockSize", 2 * columns):
+                analysis = RegionAnalysis.fromCodes(codes, rows, columns)
+            TestCase.assertEqual(self, analysis.labels.tolist(), bruteForceLabels(passable))
+            TestCase.assertEqual(self, analysis.getChokepoints(), bruteForceChokepoints(analysis.reachable.tolist()))
@@ -0,0 +1,99 @@
+from unittest import TestCase
+import io
+import os
+import random
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+
+from core.site_map import SiteMap, SquareType, squareTypesByCode
+from core.sparse_site_map import SparseSiteMap
+from core.bulldozer import Bulldozer
+from core.region_stats import RegionStats, Zone, readZoneFile
+from core.simulator_exceptions import INVALIDZONE
+
+
+def bruteForceCounts(siteMap, top, left, bottom, right):
+    counts = dict((sqType, 0) for sqType in squareTypesByCode)
+    for row in range(max(top, 0), min(bottom, siteMap.rows - 1) + 1):
+        for column in range(max(left, 0), min(right, siteMap.columns - 1) + 1):
+            counts[siteMap.getSquare(row, column)] += 1
+    return counts
+
+
+class TestRegionStats(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_counts(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        regionStats = RegionStats(siteMap)
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.ROCK, 0, 0, 4, 9), 12)
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.NONREMOVABLE_TREE, 1, 7, 2, 7), 2)
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.PLAIN, 0, 0, 0, 9), 9)
+        # Rectangles are clipped to the site
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.ROCK, 3, -5, 10, 1), 4)
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.PLAIN, 5, 0, 8, 9), 0)
+
+    def test_counts_follow_changes(self):
+        rng = random.Random(7)
+        for siteMapClass in [SiteMap, SparseSiteMap]:
+            codes = bytes(rng.choices([sqType.value for sqType in squareTypesByCode], k=12 * 9))
+            siteMap = siteMapClass.fromCodes(codes, 12, 9)
+            regionStats = RegionStats(siteMap, rebuildThreshold=8)
+            siteMap.attachRegionStats(regionStats)
+            for _ in range(60):
+                row, column = rng.randrange(12), rng.randrange(9)
+                if rng.random() < 0.8:
+                    siteMap.clearSquare(row, column)
+                else:
+                    siteMap.setSquare(row, column, rng.choice(squareTypesByCode))
+                top, left = rng.randrange(12), rng.randrange(9)
+                bottom, right = rng.randrange(top, 12), rng.randrange(left, 9)
+                TestCase.assertEqual(self, regionStats.getCounts(top, left, bottom, right),
+                                     bruteForceCounts(siteMap, top, left, bottom, right))
+
+    def test_bulldozer_updates_counts(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        regionStats = RegionStats(siteMap)
+        TestCase.assertEqual(self, siteMap.regionStats, None)
+        siteMap.attachRegionStats(regionStats)
+        bulldozer = Bulldozer(siteMap)
+        for commandStr in ["a 4", "r", "a 2"]:
+            bulldozer.applyCommand(commandStr)
+        zone = Zone("A", 0, 0, 1, 4)
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.CLEAR, 0, 0, 1, 4), 5)
+        TestCase.assertEqual(self, regionStats.countSquares(SquareType.REMOVABLE_TREE, 0, 0, 1, 4), 0)
+        TestCase.assertEqual(self, regionStats.getUnclearedSquares(zone), 5)
+        TestCase.assertEqual(self, regionStats.getUnclearedSquares(Zone("site", 0, 0, 4, 9)),
+                             siteMap.getClearableSquares())
+
+    def test_read_zone_file(self):
+        zones = readZoneFile("./test/fixtures/sample1_zones.txt")
+        TestCase.assertEqual(self, [zone.name for zone in zones], ["A", "B", "C"])
+        TestCase.assertEqual(self, (zones[2].top, zones[2].left, zones[2].bottom, zones[2].right), (0, 5, 4, 9))
+        TestCase.assertTrue(self, zones[1].contains(3, 4))
+        TestCase.assertFalse(self, zones[1].contains(3, 5))
+
+        for content, lineNumber in [("A 0 0 1\n", 1), ("A 0 0 1 4\nB 2 x 4 4\n", 2), ("A 3 0 1 4\n", 1)]:
+            filePath = os.path.join(self.directory, "zones.txt")
+            with open(filePath, "w") as f:
+                f.write(content)
+            with TestCase.assertRaises(self, Exception) as e:
+                readZoneFile(filePath)
+            TestCase.assertEqual(self, str(e.exception),
+                                 INVALIDZONE.format(lineNumber, content.splitlines()[lineNumber - 1]))
+
+    def test_zone_report(self):
+        bulldozer = Bulldozer(SiteMap("./test/fixtures/sample1.txt"))
+        bulldozer.applyCommand("a 4")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            bulldozer.generateReport(readZoneFile("./test/fixtures/sample1_zones.txt"))
+        lines = output.getvalue().splitlines()
+        TestCase.assertEqual(self, lines[-3].split(), ["A", "6", "18"])
+        TestCase.assertEqual(self, lines[-2].split(), ["B", "15", "45"])
+        TestCase.assertEqual(self, lines[-1].split(), ["C", "23", "69"])
@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from core.site_map import SiteMap
+from core.bulldozer import Bulldozer, Direction
+from core.expense import CostItem
+from core.session import readSessionFile
+from core.replay import SessionReplay
+from core.simulator_exceptions import OUTOFSITEMOVE, INVALIDKEYFRAMEINTERVAL
+
+
+class TestReplay(TestCase):
+    def set_up(self):
+        pass
+
+    def tear_down(Self):
+        pass
+
+    def expectedStates(self, commands):
+        """
+        Executes the commands on a Bulldozer and returns the codes and expenses after every command
+        """
+        bulldozer = Bulldozer(SiteMap("./test/fixtures/sample1.txt"))
+        states = [(bulldozer.siteMap.toCodes(), dict(bulldozer.expense.costQuantity))]
+        for command in commands:
+            try:
+                bulldozer.applyCommand(command)
+            except Exception:
+                states.append((bulldozer.siteMap.toCodes(), dict(bulldozer.expense.costQuantity)))
+                break
+            states.append((bulldozer.siteMap.toCodes(), dict(bulldozer.expense.costQuantity)))
+        return states
+
+    def test_seek_in_any_order(self):
+        commands = ["a 2", "r", "a 1", "l", "a 3", "r", "a 2", "r", "a 4", "l", "a 1", "l", "a 2"]
+        expected = self.expectedStates(commands)
+        replay = SessionReplay(SiteMap("./test/fixtures/sample1.txt"), commands, keyframeInterval=4)
+        TestCase.assertEqual(self, replay.getStepCount(), len(commands))
+        TestCase.assertEqual(self, len(replay.keyframes), 4)
+        for step in [13, 0, 7, 6, 2, 11, 12, 1, 9, 5]:
+            state = replay.seek(step)
+            TestCase.assertEqual(self, state.step, step)
+            TestCase.assertEqual(self, state.codes, expected[step][0])
+            TestCase.assertDictEqual(self, state.costQuantity, expected[step][1])
+            TestCase.assertEqual(self, len(state.history), step)
+
+    def test_seek_after_termination(self):
+        commands = readSessionFile("./test/fixtures/session2.txt") + ["r", "a 1"]
+        replay = SessionReplay(SiteMap("./test/fixtures/sample1.txt"), commands, keyframeInterval=2)
+        # The commands after leaving the site are not executed
+        TestCase.assertEqual(self, replay.getStepCount(), 5)
+        state = replay.seek(100)
+        TestCase.assertEqual(self, state.step, 5)
+        TestCase.assertEqual(self, state.terminationReason, OUTOFSITEMOVE)
+        TestCase.assertEqual(self, state.location.row, 2)
+        TestCase.assertEqual(self, state.location.column, 0)
+        TestCase.assertEqual(self, state.direction, Direction.WEST)
+        TestCase.assertEqual(self, state.getExpense().costQuantity[CostItem.FUEL], 13)
+
+        state = replay.seek(3)
+        TestCase.assertEqual(self, state.terminationReason, None)
+        TestCase.assertEqual(self, state.history, ["Advance 4", "Turn right", "Advance 2"])
+        TestCase.assertEqual(self, state.getSiteMap().getClearableSquares(), 42)
+
+    def test_site_map_is_not_modified(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        codes = siteMap.toCodes()
+        SessionReplay(siteMap, readSessionFile("./test/fixtures/session1.txt"))
+        TestCase.assertEqual(self, siteMap.toCodes(), codes)
+
+    def test_invalid_keyframe_interval(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        for interval in [0, -3]:
+            with TestCase.assertRaises(self, ValueError) as e:
+                SessionReplay(siteMap, ["a 2"], interval)
+            TestCase.assertEqual(self, str(e.exception), INVALIDKEYFRAMEINTERVAL.format(interval))
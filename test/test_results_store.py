@@ -0,0 +1,100 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from core.disk_cache import fileContentHash
+from core.session import replaySession
+from core.site_map import SiteMap
+from core.results_store import ResultsStore, ingestSessions, sessionRow, sessionSource, traineeFromPath, getTotalCost
+
+
+class TestResultsStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ResultsStore(os.path.join(self.directory, "sessions.sqlite"), batchSize=2)
+        self.cacheDirectory = os.path.join(self.directory, "maps")
+        os.makedirs(self.cacheDirectory)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def writeSession(self, trainee, name, commands):
+        directory = os.path.join(self.directory, trainee)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        filePath = os.path.join(directory, name)
+        with open(filePath, "w") as f:
+            f.write("\n".join(commands))
+        return filePath
+
+    def test_session_row(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        result = replaySession(siteMap.toCodes(), siteMap.rows, siteMap.columns, ["a 3", "q"])
+        row = sessionRow("map", "alice", "s1", result)
+        # communication 1, fuel 1 + 1 + 2, 48 - 3 uncleared squares, paint damage 0
+        TestCase.assertEqual(self, row, ("map", "alice", "s1", "quit", 2, 1, 4, 45, 0, 0, 140))
+        TestCase.assertEqual(self, getTotalCost(result.costQuantity), 140)
+
+    def test_ingest_and_query(self):
+        sessionFiles = [
+            self.writeSession("alice", "1.txt", ["a 3", "q"]),
+            self.writeSession("alice", "2.txt", ["a 4", "r", "a 2"]),
+            self.writeSession("bob", "1.txt", ["a 1", "r", "a 1", "l", "a 7"]),
+            self.writeSession("bob", "2.txt", ["r", "a 1", "l", "a 12"])
+        ]
+        count = ingestSessions(self.store, "./test/fixtures/sample1.txt", sessionFiles,
+                               cacheDirectory=self.cacheDirectory)
+        TestCase.assertEqual(self, count, 4)
+        fingerprint = fileContentHash("./test/fixtures/sample1.txt")
+        TestCase.assertEqual(self, self.store.getSessionCount(fingerprint), 4)
+        TestCase.assertEqual(self, self.store.getSessionCount("unknown"), 0)
+
+        lowest = self.store.getLowestCostSessions(fingerprint, 2)
+        TestCase.assertEqual(self, [session["total_cost"] for session in lowest], [138, 140])
+        TestCase.assertEqual(self, lowest[0]["source"], sessionFiles[1])
+
+        hits = self.store.getProtectedTreeHits(10)
+        TestCase.assertEqual(self, [session["trainee"] for session in hits], ["bob"])
+        TestCase.assertEqual(self, hits[0]["command_count"], 5)
+        TestCase.assertEqual(self, self.store.getProtectedTreeHits(4), [])
+
+        sessions = self.store.findSessions(trainee="bob", termination="out_of_site")
+        TestCase.assertEqual(self, [session["command_count"] for session in sessions], [2])
+
+    def test_ingest_again_replaces_sessions(self):
+        sessionFiles = [self.writeSession("alice", "1.txt", ["a 3", "q"])]
+        ingestSessions(self.store, "./test/fixtures/sample1.txt", sessionFiles,
+                       cacheDirectory=self.cacheDirectory)
+        ingestSessions(self.store, "./test/fixtures/sample1.txt", sessionFiles, trainee="carol",
+                       cacheDirectory=self.cacheDirectory)
+        sessions = self.store.findSessions()
+        TestCase.assertEqual(self, len(sessions), 1)
+        TestCase.assertEqual(self, sessions[0]["trainee"], "carol")
+
+    def test_ingest_by_relative_path(self):
+        sessionFile = self.writeSession("alice", "1.txt", ["a 3", "q"])
+        ingestSessions(self.store, "./test/fixtures/sample1.txt", [sessionFile], cacheDirectory=self.cacheDirectory)
+        ingestSessions(self.store, "./test/fixtures/sample1.txt", [os.path.relpath(sessionFile)],
+                       cacheDirectory=self.cacheDirectory)
+        sessions = self.store.findSessions()
+        TestCase.assertEqual(self, [session["source"] for session in sessions], [sessionFile])
+        # The site map is cached in the given directory
+        TestCase.assertNotEqual(self, os.listdir(self.cacheDirectory), [])
+
+    def test_graded_session_replaces_ingested_one(self):
+        sessionFile = self.writeSession("alice", "1.txt", ["a 3", "q"])
+        ingestSessions(self.store, "./test/fixtures/sample1.txt", [sessionFile], cacheDirectory=self.cacheDirectory)
+        # grade.py stores its results by the path given on the command line
+        relativePath = os.path.relpath(sessionFile)
+        result = replaySession(SiteMap("./test/fixtures/sample1.txt").toCodes(), 5, 10, ["a 3", "q"])
+        self.store.addRow(sessionRow(fileContentHash("./test/fixtures/sample1.txt"), traineeFromPath(relativePath),
+                                     sessionSource(relativePath), result))
+        self.store.flush()
+        sessions = self.store.findSessions()
+        TestCase.assertEqual(self, [session["source"] for session in sessions], [sessionFile])
+
+    def test_unknown_column(self):
+        with TestCase.assertRaises(self, Exception):
+            self.store.findSessions(orderBy="id; DROP TABLE sessions")
@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+from core.site_map import SiteMap, SquareType
+from core.bulldozer import Bulldozer, Direction
+from core.expense import CostItem
+from core.session import (
+    isValidCommand,
+    normalizeCommand,
+    readSessionFile,
+    replaySession
+)
+from core.simulator_exceptions import OUTOFSITEMOVE, MOVEONPROTECTEDTREE, QUITSIMULATION
+
+
+class TestSession(TestCase):
+    def set_up(self):
+        pass
+
+    def tear_down(Self):
+        pass
+
+    def test_is_valid_command(self):
+        TestCase.assertEqual(self, isValidCommand("a 3"), True)
+        TestCase.assertEqual(self, isValidCommand("advance 12"), True)
+        TestCase.assertEqual(self, isValidCommand("l"), True)
+        TestCase.assertEqual(self, isValidCommand("a 0"), False)
+        TestCase.assertEqual(self, isValidCommand("a x"), False)
+        TestCase.assertEqual(self, isValidCommand("turn left"), False)
+
+    def test_normalize_command(self):
+        TestCase.assertEqual(self, normalizeCommand("Advance 4"), "advance 4")
+        TestCase.assertEqual(self, normalizeCommand("Turn left"), "l")
+        TestCase.assertEqual(self, normalizeCommand(" Turn right "), "r")
+        TestCase.assertEqual(self, normalizeCommand("Quit"), "q")
+        TestCase.assertEqual(self, normalizeCommand("A 2"), "a 2")
+
+    def test_read_session_file(self):
+        commands = readSessionFile("./test/fixtures/session1.txt")
+        TestCase.assertEqual(self, commands, ["a 4", "r", "advance 2", "l", "a 3"])
+
+    def test_replay_session(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        codes = siteMap.toCodes()
+        result = replaySession(codes, siteMap.rows, siteMap.columns,
+                               readSessionFile("./test/fixtures/session1.txt"))
+        TestCase.assertEqual(self, result.location.row, 2)
+        TestCase.assertEqual(self, result.location.column, 6)
+        TestCase.assertEqual(self, result.direction, Direction.EAST)
+        TestCase.assertEqual(self, result.costQuantity[CostItem.FUEL], 10)
+        TestCase.assertEqual(self, result.costQuantity[CostItem.COMMUNICATION], 5)
+        TestCase.assertEqual(self, result.costQuantity[CostItem.PAINT_DAMAGE], 1)
+        TestCase.assertEqual(self, result.costQuantity[CostItem.UNCLEARD_SQUARE], 39)
+        TestCase.assertEqual(self, result.treeHits, [2])
+        TestCase.assertEqual(self, result.stops, [3, 23, 26])
+        TestCase.assertEqual(self, result.terminationReason, None)
+        # The codes of the site map are not modified by the replay
+        TestCase.assertEqual(self, codes, siteMap.toCodes())
+
+    def test_replay_session_matches_bulldozer(self):
+        commands = readSessionFile("./test/fixtures/session2.txt")
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        result = replaySession(siteMap.toCodes(), siteMap.rows, siteMap.columns, commands)
+
+        bulldozer = Bulldozer(siteMap)
+        with TestCase.assertRaises(self, Exception) as e:
+            for command in commands:
+                bulldozer.applyCommand(command)
+        TestCase.assertEqual(self, result.terminationReason, str(e.exception))
+        TestCase.assertEqual(self, result.terminationReason, OUTOFSITEMOVE)
+        TestCase.assertEqual(self, result.terminationCell, 20)
+        TestCase.assertEqual(self, result.history, bulldozer.history)
+        TestCase.assertDictEqual(self, result.costQuantity, bulldozer.expense.costQuantity)
+        TestCase.assertEqual(self, result.location.row, bulldozer.location.row)
+        TestCase.assertEqual(self, result.location.column, bulldozer.location.column)
+        for index in result.cleared:
+            TestCase.assertEqual(self, siteMap.siteMap[index // 10][index % 10], SquareType.CLEAR)
+
+    def test_replay_session_termination(self):
+        siteMap = SiteMap("./test/fixtures/sample1.txt")
+        codes = siteMap.toCodes()
+        result = replaySession(codes, siteMap.rows, siteMap.columns, ["a 1", "r", "a 1", "l", "a 7", "a 1"])
+        TestCase.assertEqual(self, result.terminationReason, MOVEONPROTECTEDTREE)
+        TestCase.assertEqual(self, result.terminationCell, 17)
+        TestCase.assertEqual(self, result.costQuantity[CostItem.PROTECTED_TREE_DESTRUCTION], 1)
+        TestCase.assertEqual(self, len(result.history), 5)
+
+        result = replaySession(codes, siteMap.rows, siteMap.columns, ["q", "a 2"])
+        TestCase.assertEqual(self, result.terminationReason, QUITSIMULATION)
+        TestCase.assertEqual(self, result.terminationCell, None)
+        TestCase.assertEqual(self, result.costQuantity[CostItem.COMMUNICATION], 0)
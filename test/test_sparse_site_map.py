@@ -0,0 +1,88 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from core.site_map import SiteMap, SquareType
+from core.sparse_site_map import SparseSiteMap
+from core.bulldozer import Bulldozer
+from core.expense import CostItem
+from core.simulator_exceptions import (
+    FILENOTEXIST,
+    UNACCEPTABLESQUARE,
+    NOTAGRID,
+    EMPTYFILE
+)
+
+
+class TestSparseSiteMap(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeMap(self, content):
+        filePath = os.path.join(self.directory, "site.txt")
+        with open(filePath, "w") as f:
+            f.write(content)
+        return filePath
+
+    def test_init_valid_file(self):
+        siteMap = SparseSiteMap("./test/fixtures/sample1.txt")
+        TestCase.assertEqual(self, siteMap.rows, 5)
+        TestCase.assertEqual(self, siteMap.columns, 10)
+        TestCase.assertEqual(self, siteMap.getSquare(0, 1), SquareType.PLAIN)
+        TestCase.assertEqual(self, siteMap.getSquare(0, 2), SquareType.REMOVABLE_TREE)
+        TestCase.assertEqual(self, siteMap.getSquare(2, 7), SquareType.NONREMOVABLE_TREE)
+        TestCase.assertEqual(self, siteMap.getSquare(4, 0), SquareType.ROCK)
+        # Only the rocks and trees are stored
+        TestCase.assertEqual(self, siteMap.getObstacleCount(), 16)
+        TestCase.assertEqual(self, siteMap.toCodes(), SiteMap("./test/fixtures/sample1.txt").toCodes())
+
+    def test_init_file_invalid(self):
+        for content, message in [("oox\nooo\n", UNACCEPTABLESQUARE.format('x')),
+                                 ("oox\noo\n", NOTAGRID),
+                                 ("", EMPTYFILE)]:
+            with TestCase.assertRaises(self, Exception) as e:
+                SparseSiteMap(self.writeMap(content))
+            TestCase.assertEqual(self, str(e.exception), message)
+        with TestCase.assertRaises(self, Exception) as e:
+            SparseSiteMap("fake_path")
+        TestCase.assertEqual(self, str(e.exception), FILENOTEXIST.format("fake_path"))
+
+    def test_cleared_squares(self):
+        siteMap = SparseSiteMap(self.writeMap("o*t\nT*o\n"))
+        TestCase.assertEqual(self, siteMap.getSquare(0, 1), SquareType.CLEAR)
+        TestCase.assertEqual(self, siteMap.getClearableSquares(), 3)
+        siteMap.clearSquare(0, 2)
+        siteMap.clearSquare(0, 0)
+        TestCase.assertEqual(self, siteMap.getSquare(0, 2), SquareType.CLEAR)
+        TestCase.assertEqual(self, siteMap.getClearableSquares(), 1)
+        TestCase.assertEqual(self, siteMap.getObstacleCount(), 1)
+        TestCase.assertEqual(self, siteMap.getRow(0), [SquareType.CLEAR] * 3)
+
+    def test_copy(self):
+        siteMap = SparseSiteMap(self.writeMap("o*t\nT*o\n"))
+        copy = siteMap.copy()
+        copy.clearSquare(0, 2)
+        copy.clearSquare(0, 0)
+        TestCase.assertEqual(self, siteMap.getRow(0), [SquareType.PLAIN, SquareType.CLEAR, SquareType.REMOVABLE_TREE])
+        TestCase.assertEqual(self, siteMap.getClearableSquares(), 3)
+        TestCase.assertEqual(self, copy.getRow(0), [SquareType.CLEAR] * 3)
+        TestCase.assertEqual(self, copy.toCodes(), SparseSiteMap(self.writeMap("***\nT*o\n")).toCodes())
+
+    def test_bulldozer_on_sparse_site(self):
+        commands = ["a 4", "r", "a 4", "l", "a 2", "a 4", "l", "q"]
+        dense = Bulldozer(SiteMap("./test/fixtures/sample1.txt"))
+        sparse = Bulldozer(SparseSiteMap("./test/fixtures/sample1.txt"))
+        for bulldozer in [dense, sparse]:
+            for commandStr in commands:
+                try:
+                    bulldozer.applyCommand(commandStr)
+                except Exception:
+                    break
+        TestCase.assertEqual(self, sparse.siteMap.toCodes(), dense.siteMap.toCodes())
+        TestCase.assertEqual(self, sparse.expense.costQuantity, dense.expense.costQuantity)
+        TestCase.assertEqual(self, sparse.expense.costQuantity[CostItem.PAINT_DAMAGE], 1)
+        TestCase.assertEqual(self, sparse.siteMap.getClearableSquares(), dense.siteMap.getClearableSquares())
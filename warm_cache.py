@@ -0,0 +1,27 @@
+# Driver program for pre-warming the site map cache
+# Parses, validates and caches every site map file of a directory,
+# so the simulator starts quickly on any of them
+
+#!/usr/bin/python
+
+import sys
+
+from core.map_cache import warmCache
+
+def help():
+  """
+  Provides a short description on how to run the program.
+  Will be called whenever the program is called in an incorrect way
+  """
+  print("Please run the cache warmer according to the following insruction: ")
+  print("python3 warm_cache.py <Path-to-sitemap-directory>")
+
+if __name__ == "__main__":
+  if len(sys.argv) != 2:
+    help()
+    exit(1)
+
+  cached, failed = warmCache(sys.argv[1])
+  for filePath, message in failed:
+    print("{}: {}".format(filePath, message))
+  print("Cached {} site maps, {} invalid files".format(len(cached), len(failed)))
@@ -0,0 +1,49 @@
+# Driver program for zone statistics
+# Prints the number of square blocks of each type in every zone of a site map,
+# optionally after the commands of a session
+
+#!/usr/bin/python
+
+import argparse
+
+from core.map_cache import loadSiteMap
+from core.site_map import squareTypesByCode, squareCharacterMap
+from core.session import readSessionFile
+from core.bulldozer import Bulldozer
+from core.region_stats import RegionStats, readZoneFile
+
+def parseArguments():
+  """
+  Parses the command line arguments
+  """
+  parser = argparse.ArgumentParser(description="Count the square blocks of each type in the zones of a site map")
+  parser.add_argument("sitemap", help="path to the site map file")
+  parser.add_argument("zones", help="path to the zone file")
+  parser.add_argument("--session", default=None, help="session file whose commands are applied first")
+  return parser.parse_args()
+
+if __name__ == "__main__":
+  args = parseArguments()
+  try:
+    siteMap = loadSiteMap(args.sitemap)
+    zones = readZoneFile(args.zones)
+    commands = readSessionFile(args.session) if args.session else []
+  except Exception as e:
+    print(str(e))
+    exit(1)
+
+  regionStats = RegionStats(siteMap)
+  siteMap.attachRegionStats(regionStats)
+  bulldozer = Bulldozer(siteMap)
+  for commandStr in commands:
+    try:
+      bulldozer.applyCommand(commandStr)
+    except Exception:
+      break
+
+  header = ["Zone"] + [squareCharacterMap[sqType] for sqType in squareTypesByCode] + ["Uncleared"]
+  print(('{:<20}' + ' {:>10}' * (len(header) - 1)).format(*header))
+  for zone in zones:
+    counts = regionStats.getZoneCounts(zone)
+    row = [zone.name] + [counts[sqType] for sqType in squareTypesByCode] + [regionStats.getUnclearedSquares(zone)]
+    print(('{:<20}' + ' {:>10}' * (len(row) - 1)).format(*row))